@@ -1,17 +1,26 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import uuid
+from typing import Optional
 import numpy as np
-import pandas as pd
 import os
 
+from src.bar_store import BarStore
+from src.client_pool import ClientPool, credential_digest
+from src.compact_session import CompactSession
+from src.indicator_cache import IndicatorCache
+from src.single_flight import SingleFlight
 from src.config import Config
 from src.data_loader import DataLoader
 from src.logger import setup_logger
 from src.utils import error_response, success_response
-from src.visualization import build_chart
+from src.visualization import build_chart, CHART_COLUMNS
+from src.vwap import vwap
 from src.indicators import IndicatorCalculator
 from src.decision_engine import DecisionEngine
+from src.decision_timeline import DecisionTimeline, candle_at
 from src.risk_manager import RiskManager
 
 app = Flask(__name__)
@@ -19,8 +28,41 @@ CORS(app)
 logger = setup_logger()
 
 # In-memory cache — keyed by session_id
-# Stores the fully calculated DataFrame so /api/decision never re-fetches
-_cache = {}
+# Stores the fully calculated session so /api/decision never re-fetches.
+# Request threads share it: every access goes through _cache_lock, which
+# also guards the running byte total
+_cache       = {}
+_cache_lock  = threading.Lock()
+_cache_bytes = 0
+
+# Sessions are evicted oldest-first past either limit
+MAX_SESSIONS        = 200
+SESSION_CACHE_BYTES = int(os.environ.get('SESSION_CACHE_MB', 64)) * 1024 * 1024
+
+# Store display-only columns as float32 (decision columns always stay float64)
+COMPACT_SESSIONS = os.environ.get('COMPACT_SESSIONS', '1') != '0'
+
+# Upper bound on candle indices per /api/decisions request
+MAX_BATCH_DECISIONS = 50000
+
+# Worker threads used to analyse symbols in parallel for /api/scan
+SCAN_WORKERS = 8
+
+# On-disk bar store — shared by every request so repeat symbol/timeframe
+# pulls only fetch the missing head/tail from Alpaca
+_bar_store = BarStore(os.environ.get(
+    'BAR_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars')
+))
+
+# Alpaca clients reused across requests from the same credentials
+_client_pool = ClientPool()
+
+# Coalesces concurrent /api/chart requests with the same Config fingerprint
+# and the same credentials — callers never share another user's fetch or error
+_chart_flight = SingleFlight()
+
+# Indicator results keyed by input content — shared across sessions and symbols
+_indicator_cache = IndicatorCache(int(os.environ.get('INDICATOR_CACHE_MB', 128)) * 1024 * 1024)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -32,7 +74,7 @@ def health():
 def chart():
     """
     Heavy endpoint — fetches data, calculates all indicators,
-    builds chart, runs initial decision. Stores df in cache.
+    builds chart, runs initial decision. Stores the session in cache.
     """
     payload = request.get_json()
     if not payload:
@@ -44,63 +86,44 @@ def chart():
     if not valid:
         return jsonify(error_response(msg)), 400
 
-    # 2. Fetch
-    loader = DataLoader(config.api_key, config.secret_key)
+    # 2–5, 7, 8. Fetch → indicators → VWAP → decision → chart.
+    # Identical concurrent requests wait on one computation and share it.
     try:
-        df = loader.fetch(config)
-    except Exception as e:
-        return jsonify(error_response(f'Data fetch failed: {str(e)}')), 500
-
-    valid, msg = loader.validate(df, config)
-    if not valid:
-        return jsonify(error_response(msg)), 400
-
-    # 3. Decision index
-    try:
-        decision_idx = loader.get_decision_index(df, config)
-    except ValueError as e:
-        return jsonify(error_response(str(e))), 400
-
-    # 4. Indicators
-    calc = IndicatorCalculator(config)
-    df   = calc.calculate(df)
-
-    # 5. VWAP
-    df = _add_vwap(df)
-
-    # 6. Cache the df — generate a session id to return to frontend
-    session_id = str(uuid.uuid4())
-    _cache[session_id] = {
-        'df':     df,
-        'config': config
-    }
-    # Prune old sessions if cache grows too large
-    if len(_cache) > 20:
-        oldest = next(iter(_cache))
-        del _cache[oldest]
-
-    # 7. Run initial decision
-    decision = _run_decision(df, config, decision_idx)
-
-    # 8. Build chart
-    fig_dict = build_chart(df, config.symbol, decision_idx)
-
-    return jsonify(success_response({
-        'figure':             fig_dict,
-        'candle_count':       len(df),
-        'decision_timestamp': str(df.index[decision_idx]),
+        key      = f'{credential_digest(config.api_key, config.secret_key)}:{config.fingerprint()}'
+        analysis = _chart_flight.do(key, lambda: _analyze_chart(config))
+    except AnalysisError as e:
+        return jsonify(error_response(e.message)), e.status
+
+    session      = analysis['session']
+    decision_idx = analysis['decision_idx']
+
+    # 6. Cache the session — generate a session id to return to frontend
+    timeline   = analysis['timeline']
+    session_id = _cache_session(session, timeline, config)
+
+    response = {
+        'figure':             analysis['figure'],
+        'candle_count':       len(session),
+        'session_bytes':      session.nbytes,
+        'decision_timestamp': str(session.timestamp(decision_idx)),
         'decision_idx':       decision_idx,
         'symbol':             config.symbol,
-        'decision':           decision,
+        'decision':           analysis['decision'],
         'session_id':         session_id,
-    }))
+    }
+    # Compact clients get the display templates once, here, for the whole session
+    if config.response_format == 'compact':
+        response['decision']  = timeline.raw_decision(session, decision_idx)
+        response['templates'] = timeline.templates()
+
+    return jsonify(success_response(response))
 
 
 @app.route('/api/decision', methods=['POST'])
 def decision():
     """
-    Lightweight endpoint — reruns decision engine at a new candle index.
-    Uses cached df, no re-fetch, no indicator recalculation.
+    Lightweight endpoint — looks up the decision at a new candle index in
+    the session's precomputed timeline. No re-fetch, no recalculation.
     """
     payload = request.get_json()
     if not payload:
@@ -109,7 +132,8 @@ def decision():
     session_id   = payload.get('session_id')
     decision_idx = payload.get('decision_idx')
 
-    if not session_id or session_id not in _cache:
+    cached = _cached_session(session_id)
+    if cached is None:
         return jsonify(error_response(
             'Session expired or not found. Please run a full analysis first.'
         )), 400
@@ -117,41 +141,244 @@ def decision():
     if decision_idx is None:
         return jsonify(error_response('No decision index provided.')), 400
 
-    cached = _cache[session_id]
-    df     = cached['df']
-    config = cached['config']
+    session  = cached['session']
+    timeline = cached['timeline']
+    config   = cached['config']
 
-    decision_idx = int(decision_idx)
+    decision_idx    = int(decision_idx)
+    response_format = payload.get('format', config.response_format)
+    if response_format not in Config.RESPONSE_FORMATS:
+        return jsonify(error_response(f'Invalid format: {response_format}')), 400
 
     # Validate index has enough warmup candles before it
-    valid, msg = _validate_decision_idx(df, decision_idx, config)
+    valid, msg = _validate_decision_idx(session, decision_idx, config)
     if not valid:
         return jsonify(error_response(msg)), 400
 
-    # Run decision at new index
-    decision = _run_decision(df, config, decision_idx)
+    # Look up the decision at the new index
+    if response_format == 'compact':
+        decision = timeline.raw_decision(session, decision_idx)
+    else:
+        decision = timeline.decision(session, decision_idx)
+    prev_signal, next_signal = timeline.neighbors(decision_idx)
 
     # Build updated vertical line positions for chart
-    decision_timestamp = str(df.index[decision_idx])
+    decision_timestamp = str(session.timestamp(decision_idx))
 
     return jsonify(success_response({
         'decision':           decision,
         'decision_idx':       decision_idx,
         'decision_timestamp': decision_timestamp,
+        'prev_signal_idx':    prev_signal,
+        'next_signal_idx':    next_signal,
     }))
 
 
+@app.route('/api/decisions', methods=['POST'])
+def decisions():
+    """
+    Batch /api/decision — many candle indices of one session in a single
+    request, as a columnar table. Takes `indices` (a list) or a
+    `start` / `stop` / `step` range (stop exclusive, defaults to the end).
+    """
+    payload = request.get_json()
+    if not payload:
+        return jsonify(error_response('No payload received.')), 400
+
+    session_id = payload.get('session_id')
+    cached     = _cached_session(session_id)
+    if cached is None:
+        return jsonify(error_response(
+            'Session expired or not found. Please run a full analysis first.'
+        )), 400
+
+    session  = cached['session']
+    timeline = cached['timeline']
+    config   = cached['config']
+
+    if payload.get('indices') is not None:
+        indices = payload['indices']
+        if not isinstance(indices, list) or not all(_is_int(v) for v in indices):
+            return jsonify(error_response('indices must be a flat list of integer candle indices.')), 400
+        idx = np.asarray(indices, dtype=np.int64) if all(abs(v) < 2 ** 63 for v in indices) else None
+    elif payload.get('start') is not None:
+        bounds = (payload['start'], payload.get('stop', len(session)), payload.get('step', 1))
+        if not all(_is_int(v) for v in bounds) or bounds[2] == 0:
+            return jsonify(error_response('start / stop / step must be integers (step non-zero).')), 400
+        # Sized before anything is allocated
+        start, stop, step = bounds
+        if max(0, -((start - stop) // step)) > MAX_BATCH_DECISIONS:
+            return jsonify(error_response(
+                f'At most {MAX_BATCH_DECISIONS} candles can be requested at once.'
+            )), 400
+        idx = np.arange(*bounds, dtype=np.int64) if all(abs(v) < 2 ** 63 for v in bounds) else None
+    else:
+        return jsonify(error_response('Provide indices or a start / stop range.')), 400
+
+    if idx is None:
+        return jsonify(error_response(f'Candle indices must be within 0–{len(session) - 1}.')), 400
+    if len(idx) == 0:
+        return jsonify(error_response('No candles requested.')), 400
+    if len(idx) > MAX_BATCH_DECISIONS:
+        return jsonify(error_response(
+            f'At most {MAX_BATCH_DECISIONS} candles can be requested at once.'
+        )), 400
+
+    valid, msg = _validate_decision_indices(session, idx, config)
+    if not valid:
+        return jsonify(error_response(msg)), 400
+
+    response = timeline.columns(session, idx)
+    response['count'] = len(idx)
+    return jsonify(success_response(response))
+
+
+@app.route('/api/scan', methods=['POST'])
+def scan():
+    """
+    Watchlist endpoint — one batched fetch for every symbol, then
+    indicators + decision per symbol in parallel. Returns a compact
+    per-symbol decision table. No chart, nothing cached.
+    """
+    payload = request.get_json()
+    if not payload:
+        return jsonify(error_response('No payload received.')), 400
+
+    config = Config(payload)
+    valid, msg = config.validate_scan()
+    if not valid:
+        return jsonify(error_response(msg)), 400
+
+    loader = DataLoader(config.api_key, config.secret_key,
+                        client=_client_pool.get(config.api_key, config.secret_key))
+    try:
+        frames = loader.fetch_many(config, config.symbols)
+    except Exception as e:
+        return jsonify(error_response(f'Data fetch failed: {str(e)}')), 500
+
+    workers = min(SCAN_WORKERS, len(config.symbols))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda symbol: _scan_symbol(symbol, frames.get(symbol), config, loader),
+            config.symbols
+        ))
+
+    response = {
+        'results':      results,
+        'symbol_count': len(results),
+        'trade_count':  sum(1 for r in results if r.get('signal')),
+    }
+    if config.response_format == 'compact':
+        response['templates'] = DecisionEngine(config).templates()
+
+    return jsonify(success_response(response))
+
+
 # ------------------------------------------------------------------ #
 # SHARED HELPERS
 # ------------------------------------------------------------------ #
 
-def _run_decision(df: pd.DataFrame, config: Config, idx: int) -> dict:
+class AnalysisError(Exception):
+    """Carries an error message + HTTP status out of a (shared) analysis."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.message = message
+        self.status  = status
+
+
+def _analyze_chart(config: Config) -> dict:
+    """
+    The heavy part of /api/chart. Runs once per in-flight fingerprint and
+    credentials, so the result is shared read-only between coalesced callers.
+    """
+    # 2. Fetch
+    loader = DataLoader(config.api_key, config.secret_key, store=_bar_store,
+                        client=_client_pool.get(config.api_key, config.secret_key))
+    try:
+        df = loader.fetch(config)
+    except Exception as e:
+        raise AnalysisError(f'Data fetch failed: {str(e)}', 500)
+
+    valid, msg = loader.validate(df, config)
+    if not valid:
+        raise AnalysisError(msg, 400)
+
+    # 3. Decision index
+    try:
+        decision_idx = loader.get_decision_index(df, config)
+    except ValueError as e:
+        raise AnalysisError(str(e), 400)
+
+    # 4. Indicators — only what the enabled layers and the chart read
+    columns = DecisionEngine(config).required_columns() + list(CHART_COLUMNS)
+    calc  = IndicatorCalculator(config, cache=_indicator_cache)
+    frame = calc.compute(df, columns=columns)
+
+    # 5. VWAP — into the row compute() reserved for it
+    frame['vwap'] = vwap(frame)['vwap']
+
+    # 6. Pack into the compact session format — the frame is dropped after this
+    session = CompactSession.from_frame(frame, compact=COMPACT_SESSIONS)
+
+    # 7. Decisions for every candle — /api/decision reads these
+    timeline = DecisionTimeline.build(session, config)
+    decision = timeline.decision(session, decision_idx)
+
+    # 8. Build chart
+    fig_dict = build_chart(frame, config.symbol, decision_idx)
+
+    return {
+        'session':      session,
+        'timeline':     timeline,
+        'decision_idx': decision_idx,
+        'decision':     decision,
+        'figure':       fig_dict,
+    }
+
+
+def _cache_session(session: CompactSession, timeline: DecisionTimeline, config: Config) -> str:
+    """Store a session under a new id, evicting the oldest past the count/byte limits."""
+    global _cache_bytes
+    session_id = str(uuid.uuid4())
+    entry      = {
+        'session':  session,
+        'timeline': timeline,
+        'config':   config
+    }
+
+    with _cache_lock:
+        _cache[session_id] = entry
+        _cache_bytes      += _entry_bytes(entry)
+        while len(_cache) > 1 and (len(_cache) > MAX_SESSIONS or _cache_bytes > SESSION_CACHE_BYTES):
+            oldest = next(iter(_cache))
+            _cache_bytes -= _entry_bytes(_cache.pop(oldest))
+        count, total = len(_cache), _cache_bytes
+
+    logger.info(f"Session cached — {session.nbytes / 1024:.0f} KB, "
+                f"{count} sessions / {total / 1024 / 1024:.1f} MB total")
+    return session_id
+
+
+def _cached_session(session_id) -> Optional[dict]:
+    """The cached entry of a session id, or None once it's gone (or was never there)."""
+    if not session_id:
+        return None
+    with _cache_lock:
+        return _cache.get(session_id)
+
+
+def _entry_bytes(entry: dict) -> int:
+    return entry['session'].nbytes + entry['timeline'].nbytes
+
+
+def _run_decision(session: CompactSession, config: Config, idx: int) -> dict:
     """Run decision engine + risk manager at a given candle index."""
-    candle   = df.iloc[idx]
-    prev_obv = df['obv'].iloc[idx - 1] if idx > 0 else None
+    candle   = session.candle(idx)
+    prev_obv = float(session.column('obv')[idx - 1]) if idx > 0 and 'obv' in session else None
 
     engine   = DecisionEngine(config)
-    decision = engine.make_decision(candle, prev_obv)
+    decision = engine.describe(candle, prev_obv, engine.states_at(session, idx))
 
     if decision['decision'] == 'TRADE':
         risk_mgr = RiskManager(config)
@@ -160,10 +387,86 @@ def _run_decision(df: pd.DataFrame, config: Config, idx: int) -> dict:
     return decision
 
 
-def _validate_decision_idx(df: pd.DataFrame, idx: int, config) -> tuple[bool, str]:
+def _run_raw_decision(session: CompactSession, config: Config, idx: int) -> dict:
+    """Compact _run_decision — codes, raw values and risk levels, no display strings."""
+    candle, prev_obv = candle_at(session, idx)
+    engine   = DecisionEngine(config)
+    decision = engine.raw_decision(candle, prev_obv, engine.states_at(session, idx))
+
+    if decision['signal']:
+        risk_mgr = RiskManager(config)
+        sl, tp   = risk_mgr.risk_distances(
+            np.array([decision['signal']]), np.array([candle['atr']]), np.array([candle['z_score']])
+        )
+        decision['risk'] = risk_mgr.risk_levels(candle['close'], decision['signal'], float(sl[0]), float(tp[0]))
+
+    return decision
+
+
+def _scan_symbol(symbol: str, df, config: Config, loader: DataLoader) -> dict:
+    """Indicators + VWAP + decision for one symbol of a scan, as one table row."""
+    if df is None:
+        return {'symbol': symbol, 'status': 'error', 'message': 'No data returned.'}
+
+    valid, msg = loader.validate(df, config)
+    if not valid:
+        return {'symbol': symbol, 'status': 'error', 'message': msg}
+
+    try:
+        decision_idx = loader.get_decision_index(df, config)
+    except ValueError as e:
+        return {'symbol': symbol, 'status': 'error', 'message': str(e)}
+
+    # One symbol failing must not fail the whole scan
+    try:
+        return _scan_row(symbol, df, config, decision_idx)
+    except Exception as e:
+        logger.warning(f"Scan failed for {symbol}: {e}")
+        return {'symbol': symbol, 'status': 'error', 'message': f'Analysis failed: {str(e)}'}
+
+
+def _scan_row(symbol: str, df, config: Config, decision_idx: int) -> dict:
+    """The decision table row of a validated scan symbol."""
+    columns = DecisionEngine(config).required_columns()
+    frame = IndicatorCalculator(config, cache=_indicator_cache).compute(df, columns=columns)
+    if 'vwap' in frame:
+        frame['vwap'] = vwap(frame)['vwap']
+    session = CompactSession.from_frame(frame)
+
+    if config.response_format == 'compact':
+        row = {
+            'symbol':             symbol,
+            'status':             'ok',
+            'decision_timestamp': str(df.index[decision_idx]),
+            'candle_count':       len(df),
+        }
+        row.update(_run_raw_decision(session, config, decision_idx))
+        return row
+
+    decision = _run_decision(session, config, decision_idx)
+
+    row = {
+        'symbol':             symbol,
+        'status':             'ok',
+        'decision':           decision['decision'],
+        'direction':          decision['direction'],
+        'signal':             decision['signal'],
+        'reason':             decision['reason'],
+        'layers_fired':       [l['layer'] for l in decision['layers'] if l['result'] == 'TRADE'],
+        'close':              float(df['close'].iloc[decision_idx]),
+        'decision_timestamp': str(df.index[decision_idx]),
+        'candle_count':       len(df),
+    }
+    for key in ('stop_loss', 'take_profit', 'risk_reward_ratio'):
+        if key in decision:
+            row[key] = float(decision[key])
+    return row
+
+
+def _validate_decision_idx(session: CompactSession, idx: int, config) -> tuple[bool, str]:
     """Check that idx is valid and has enough warmup candles before it."""
-    if idx < 0 or idx >= len(df):
-        return False, f'Candle index {idx} is out of range (0–{len(df) - 1}).'
+    if idx < 0 or idx >= len(session):
+        return False, f'Candle index {idx} is out of range (0–{len(session) - 1}).'
 
     if idx < config.min_warmup_candles:
         return False, (
@@ -175,20 +478,29 @@ def _validate_decision_idx(df: pd.DataFrame, idx: int, config) -> tuple[bool, st
     return True, ''
 
 
-def _add_vwap(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df['tp']   = (df['high'] + df['low'] + df['close']) / 3
-    df['date'] = df.index.normalize()
+def _is_int(value) -> bool:
+    # JSON true / false arrive as bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate_decision_indices(session: CompactSession, idx: np.ndarray, config) -> tuple[bool, str]:
+    """_validate_decision_idx for an index array — one vectorized check, first offender reported."""
+    out_of_range = (idx < 0) | (idx >= len(session))
+    if out_of_range.any():
+        return False, (
+            f'{int(out_of_range.sum())} candle indices are out of range (0–{len(session) - 1}), '
+            f'e.g. {int(idx[out_of_range.argmax()])}.'
+        )
 
-    vwap_values = []
-    for date, group in df.groupby('date'):
-        cum_tp_vol = (group['tp'] * group['volume']).cumsum()
-        cum_vol    = group['volume'].cumsum()
-        vwap_values.append(cum_tp_vol / cum_vol)
+    early = idx < config.min_warmup_candles
+    if early.any():
+        return False, (
+            f'{int(early.sum())} candle indices have fewer than {config.min_warmup_candles} '
+            f'candles before them, e.g. {int(idx[early.argmax()])}. '
+            f'Please select later candles.'
+        )
 
-    df['vwap'] = pd.concat(vwap_values)
-    df.drop(columns=['tp', 'date'], inplace=True)
-    return df
+    return True, ''
 
 
 if __name__ == '__main__':
@@ -0,0 +1,348 @@
+"""
+Backtest engine for SYNAPSE web app.
+Simulates the RiskManager exits for per-candle signals over a whole series.
+Exits for every candidate entry are found at once on (entries × horizon)
+price windows; only the chaining of non-overlapping trades walks trade by
+trade, never bar by bar.
+
+Trade model (one position at a time, prices normalised so LONG and SHORT
+share one code path):
+
+    entry          close of the signal candle
+    partial_exit_1 first `partial_exit_1_size` of the position; the stop
+                   then moves to trailing_stop (break-even)
+    partial_exit_2 next `partial_exit_2_size`; the stop moves up to
+                   partial_exit_1
+    take_profit    whatever is left
+    stop           stop_loss until partial 1, then the trailing stop
+
+Partial exits at or beyond take_profit are skipped. Levels are checked from
+the candle after entry; a gap through a level fills at the open. When one
+candle touches a stop and a target, the stop is assumed first and the trade
+is flagged `ambiguous` — unless an IntrabarSimulator (src/intrabar.py) is
+given, which replays those candles on 1Min bars.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from .config import Config
+from .logger import get_logger
+from .risk_manager import RiskManager
+
+logger = get_logger()
+
+# Exit reason codes — index into EXIT_REASONS
+EXIT_STOP, EXIT_TRAIL, EXIT_TARGET, EXIT_END = range(4)
+EXIT_REASONS = ('stop_loss', 'trailing_stop', 'take_profit', 'end_of_data')
+
+# Keys of BacktestEngine.stats
+STATS = ('trades', 'win_rate', 'total_pnl', 'profit_factor', 'avg_r', 'max_drawdown', 'final_equity', 'ambiguous')
+
+# Candidate entries per horizon pass, and the first horizon in candles —
+# unresolved entries are retried with a 4x longer one. CELL_BUDGET caps
+# entries × candles per pass, so long horizons take fewer entries at a time
+ENTRY_CHUNK   = 4096
+FIRST_HORIZON = 32
+CELL_BUDGET   = 1 << 20
+
+# RiskManager levels the trade model reads, in resolve_exits order
+LEVELS = ('stop_loss', 'take_profit', 'partial_exit_1', 'partial_exit_2', 'trailing_stop')
+
+_NEVER = np.iinfo(np.int64).max
+
+
+def _first(mask: np.ndarray) -> np.ndarray:
+    """Column of the first True per row, _NEVER where there is none."""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), _NEVER)
+
+
+def normalise(side: np.ndarray, o: np.ndarray, h: np.ndarray, l: np.ndarray) -> tuple:
+    """
+    (favourable, adverse, open) price windows with SHORT rows mirrored, so
+    targets are always above and stops below. side is 1 / -1 per row.
+    """
+    s = side[:, None]
+    return np.where(s > 0, h, -l), np.where(s > 0, l, -h), s * o
+
+
+def resolve_exits(side: np.ndarray, fav: np.ndarray, adv: np.ndarray, opn: np.ndarray,
+                  real: np.ndarray, levels: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    The trade model on (trades × steps) normalised price windows (`real`
+    masks steps past the data). levels holds the RiskManager prices of each
+    row. Returns the step of the exit, of each filled partial and of the
+    first ambiguous step (_NEVER when none), every ambiguous step as
+    t_ambs (exit tie, partial 1, partial 2), the exit reason and real fill
+    prices.
+    """
+    steps = fav.shape[1]
+    col   = np.arange(steps)[None, :]
+    sl, tp, p1, p2, trail = (side * levels[k] for k in LEVELS)
+
+    use1 = p1 < tp
+    use2 = use1 & (p2 < tp)
+
+    t_sl = _first((adv <= sl[:, None]) & real)
+    t_tp = _first((fav >= tp[:, None]) & real)
+    t_p1 = np.where(use1, _first((fav >= p1[:, None]) & real), _NEVER)
+    t_p2 = np.where(use2, _first((fav >= p2[:, None]) & real), _NEVER)
+    t_be = _first((adv <= trail[:, None]) & (col > t_p1[:, None]) & real)
+    t_s2 = _first((adv <= p1[:, None]) & (col > t_p2[:, None]) & real)
+
+    # Stop first on a shared candle — a partial only fills strictly before the stop of its phase
+    got1   = t_p1 < t_sl
+    got2   = got1 & (t_p2 < t_be)
+    t_stop = np.where(got2, t_s2, np.where(got1, t_be, t_sl))
+    stop   = np.where(got2, p1, np.where(got1, trail, sl))
+    t_exit = np.minimum(t_stop, t_tp)
+
+    def at(values, t):
+        return np.take_along_axis(values, np.minimum(t, steps - 1)[:, None], axis=1)[:, 0]
+
+    def fill(t, level, stop_side):
+        # Price at the touch — the open instead when the candle gapped through
+        op = at(opn, t)
+        return side * (np.minimum(op, level) if stop_side else np.maximum(op, level))
+
+    by_stop = t_stop <= t_tp
+    g1, g2  = got1 & (t_p1 <= t_exit), got2 & (t_p2 <= t_exit)
+
+    # Steps where a stop and a target met, so candle order decided the
+    # outcome: a tie at the exit, or a partial's candle that also reached the
+    # stop it moved to (only checked from the next candle)
+    tie    = (t_stop == t_tp) | (use1 & ~got1 & (t_p1 == t_sl)) | (got1 & use2 & ~got2 & (t_p2 == t_be))
+    t_ambs = np.stack([
+        np.where(tie & (t_exit < steps), t_exit, _NEVER),
+        np.where(g1 & (at(adv, t_p1) <= trail), t_p1, _NEVER),
+        np.where(g2 & (at(adv, t_p2) <= p1), t_p2, _NEVER),
+    ])
+    return {
+        't_exit':    t_exit,
+        't_p1':      np.where(g1, t_p1, _NEVER),
+        't_p2':      np.where(g2, t_p2, _NEVER),
+        't_amb':     t_ambs.min(axis=0),
+        't_ambs':    t_ambs,
+        'reason':    np.where(by_stop, np.where(got1, EXIT_TRAIL, EXIT_STOP), EXIT_TARGET),
+        'exit_fill': np.where(by_stop, fill(t_exit, stop, True), fill(t_exit, tp, False)),
+        'p1_fill':   fill(t_p1, p1, False),
+        'p2_fill':   fill(t_p2, p2, False),
+    }
+
+
+class BacktestEngine:
+
+    def __init__(self, config: Config, intrabar=None):
+        # intrabar — optional IntrabarSimulator that replays ambiguous candles on 1Min bars
+        self.config   = config
+        self.intrabar = intrabar
+        self._risk    = RiskManager(config)
+
+    def run(self, bars, signal: np.ndarray, sl_distance: np.ndarray, tp_distance: np.ndarray,
+            initial_capital: float = 100_000.0, size: float = 1.0) -> Dict:
+        """
+        Backtest per-candle signals (1 / -1 / 0) with RiskManager stop /
+        target distances. bars is anything with open/high/low/close columns
+        and an index (DataFrame, IndicatorFrame or CompactSession).
+        Signals inside min_warmup_candles are ignored.
+
+        Returns:
+            trades — DataFrame, one row per trade
+            equity — Series, marked to market at every close
+            stats  — dict of summary metrics
+        """
+        o, h, l, c = (np.asarray(bars[k], dtype=np.float64) for k in ('open', 'high', 'low', 'close'))
+        n      = len(c)
+        signal = np.asarray(signal)
+        levels = self._risk.risk_level_columns(c, signal, sl_distance, tp_distance)
+
+        # Candidates — a trade needs at least one candle after entry
+        entries = np.flatnonzero(signal[:n - 1])
+        entries = entries[(entries >= self.config.min_warmup_candles) & ~np.isnan(levels['stop_loss'][entries])]
+
+        exits = self._exits(o, h, l, c, signal, levels, entries)
+        if self.intrabar is not None:
+            self.intrabar.refine(o, h, l, c, signal, levels, entries, exits)
+        taken = self._chain(entries, exits['exit_idx'])
+
+        trades = self._trades(bars, signal, levels, entries[taken], {k: v[taken] for k, v in exits.items()}, size)
+        equity = self._equity(bars, c, trades, initial_capital, size)
+
+        logger.info(f"Backtest — {len(trades)} trades over {n} candles "
+                    f"from {len(entries)} candidate entries")
+        return {'trades': trades, 'equity': equity, 'stats': self.stats(trades, equity, initial_capital)}
+
+    def run_timeline(self, session, timeline, **kwargs) -> Dict:
+        """run() on a cached session and its DecisionTimeline."""
+        return self.run(session, timeline.signal, timeline.sl_distance, timeline.tp_distance, **kwargs)
+
+    # ------------------------------------------------------------------ #
+    # EXIT SEARCH — every candidate entry at once
+    # ------------------------------------------------------------------ #
+
+    def _exits(self, o, h, l, c, signal, levels, entries, last=None) -> Dict[str, np.ndarray]:
+        """
+        Exit candle, reason, fills and ambiguity for each candidate entry.
+        last is the final candle each entry may use (default the series end) —
+        several series laid end to end search in one pass.
+        """
+        m    = len(entries)
+        last = np.full(m, len(c) - 1, dtype=np.int64) if last is None else last
+        out  = {
+            'exit_idx':  last.copy(),
+            'reason':    np.full(m, EXIT_END, dtype=np.int8),
+            'exit_fill': c[last],
+            'p1_idx':    np.full(m, -1, dtype=np.int64),
+            'p2_idx':    np.full(m, -1, dtype=np.int64),
+            'p1_fill':   np.full(m, np.nan),
+            'p2_fill':   np.full(m, np.nan),
+            'ambiguous': np.zeros(m, dtype=bool),
+            'amb_idx':   np.full(m, -1, dtype=np.int64),
+        }
+
+        pending, horizon = np.arange(m), FIRST_HORIZON
+        while len(pending):
+            chunk = max(1, min(ENTRY_CHUNK, CELL_BUDGET // horizon))
+            for lo in range(0, len(pending), chunk):
+                rows = pending[lo:lo + chunk]
+                # No wider than the furthest candle any entry of the chunk can reach
+                width = int(min(horizon, (last[rows] - entries[rows]).max()))
+                self._search(o, h, l, c, signal, levels, entries[rows], last[rows], width, rows, out)
+            # Entries still open at the horizon (and short of their last candle) go again, further out
+            unresolved = (out['reason'][pending] == EXIT_END) & (entries[pending] + horizon < last[pending])
+            pending    = pending[unresolved]
+            horizon   *= 4
+        return out
+
+    def _search(self, o, h, l, c, signal, levels, idx, last, horizon, rows, out) -> None:
+        """Exit rules for a chunk of entries on their next `horizon` candles."""
+        step = idx[:, None] + 1 + np.arange(horizon)
+        at   = np.minimum(step, last[:, None])
+        real = step <= last[:, None]
+
+        side = signal[idx].astype(np.float64)
+        path = normalise(side, o[at], h[at], l[at])
+        r    = resolve_exits(side, *path, real, {k: levels[k][idx] for k in LEVELS})
+
+        done = r['t_exit'] < horizon
+        g1, g2, amb = r['t_p1'] < horizon, r['t_p2'] < horizon, r['t_amb'] < horizon
+        out['exit_idx'][rows[done]]  = (idx + 1 + r['t_exit'])[done]
+        out['reason'][rows[done]]    = r['reason'][done]
+        out['exit_fill'][rows[done]] = r['exit_fill'][done]
+        out['amb_idx'][rows[amb]]    = (idx + 1 + r['t_amb'])[amb]
+        out['ambiguous'][rows]       = amb
+        out['p1_idx'][rows[g1]]  = (idx + 1 + r['t_p1'])[g1]
+        out['p1_fill'][rows[g1]] = r['p1_fill'][g1]
+        out['p2_idx'][rows[g2]]  = (idx + 1 + r['t_p2'])[g2]
+        out['p2_fill'][rows[g2]] = r['p2_fill'][g2]
+
+    @staticmethod
+    def _chain(entries: np.ndarray, exit_idx: np.ndarray) -> np.ndarray:
+        """
+        Positions of the trades actually taken: one at a time, the next
+        entry being the first signal at or after the previous exit candle.
+        """
+        # Successor of every candidate up front — the walk is then list lookups
+        nxt = np.maximum(np.searchsorted(entries, exit_idx, side='left'),
+                         np.arange(1, len(entries) + 1)).tolist()
+        taken, k = [], 0
+        while k < len(entries):
+            taken.append(k)
+            k = nxt[k]
+        return np.array(taken, dtype=np.int64)
+
+    # ------------------------------------------------------------------ #
+    # RESULTS
+    # ------------------------------------------------------------------ #
+
+    def unit_pnl(self, side: np.ndarray, entry_price: np.ndarray, exits: Dict[str, np.ndarray]) -> np.ndarray:
+        """PnL per unit of position over its partial and final fills."""
+        c = self.config
+        # Fractions filled at each exit (partials only when they happened)
+        f1 = np.where(exits['p1_idx'] >= 0, c.partial_exit_1_size, 0.0)
+        f2 = np.where(exits['p2_idx'] >= 0, c.partial_exit_2_size, 0.0)
+        fr = 1.0 - f1 - f2
+
+        gain = (f1 * np.nan_to_num(exits['p1_fill'] - entry_price)
+                + f2 * np.nan_to_num(exits['p2_fill'] - entry_price)
+                + fr * (exits['exit_fill'] - entry_price))
+        return side * gain
+
+    def _trades(self, bars, signal, levels, idx, exits, size) -> pd.DataFrame:
+        """Trade list — fills and PnL per position (size units at entry)."""
+        side = signal[idx].astype(np.float64)
+        px   = np.asarray(bars['close'], dtype=np.float64)[idx]
+        gain = self.unit_pnl(side, px, exits)
+        pnl  = gain * size
+        risk = levels['risk_amount'][idx]
+
+        index = _index(bars)
+        return pd.DataFrame({
+            'entry_idx':      idx,
+            'exit_idx':       exits['exit_idx'],
+            'entry_time':     index[idx],
+            'exit_time':      index[exits['exit_idx']],
+            'direction':      np.where(side > 0, 'LONG', 'SHORT'),
+            'entry_price':    px,
+            'stop_loss':      levels['stop_loss'][idx],
+            'take_profit':    levels['take_profit'][idx],
+            'partial_1_idx':  exits['p1_idx'],
+            'partial_1_fill': exits['p1_fill'],
+            'partial_2_idx':  exits['p2_idx'],
+            'partial_2_fill': exits['p2_fill'],
+            'exit_price':     exits['exit_fill'],
+            'exit_reason':    np.asarray(EXIT_REASONS)[exits['reason']],
+            'bars_held':      exits['exit_idx'] - idx,
+            'pnl':            pnl,
+            'return':         gain / px,
+            'r_multiple':     gain / risk,
+            'ambiguous':      exits['ambiguous'],
+        })
+
+    def _equity(self, bars, close, trades, initial_capital, size) -> pd.Series:
+        """Cash + open position at every close, from per-candle position / cash deltas."""
+        n     = len(close)
+        units = np.zeros(n)
+        cash  = np.zeros(n)
+        side  = np.where(trades['direction'].to_numpy() == 'LONG', 1.0, -1.0) * size
+        c     = self.config
+
+        def book(at, qty, price):
+            ok = at >= 0
+            np.add.at(units, at[ok], qty[ok])
+            np.add.at(cash, at[ok], -(qty * np.nan_to_num(price))[ok])
+
+        f1 = np.where(trades['partial_1_idx'] >= 0, c.partial_exit_1_size, 0.0)
+        f2 = np.where(trades['partial_2_idx'] >= 0, c.partial_exit_2_size, 0.0)
+        book(trades['entry_idx'].to_numpy(), side, trades['entry_price'].to_numpy())
+        book(trades['partial_1_idx'].to_numpy(), -side * f1, trades['partial_1_fill'].to_numpy())
+        book(trades['partial_2_idx'].to_numpy(), -side * f2, trades['partial_2_fill'].to_numpy())
+        book(trades['exit_idx'].to_numpy(), -side * (1.0 - f1 - f2), trades['exit_price'].to_numpy())
+
+        equity = initial_capital + np.cumsum(cash) + np.cumsum(units) * close
+        return pd.Series(equity, index=_index(bars), name='equity')
+
+    @staticmethod
+    def stats(trades: pd.DataFrame, equity: pd.Series, initial_capital: float) -> Dict:
+        """Summary metrics of a run."""
+        pnl  = trades['pnl'].to_numpy()
+        eq   = equity.to_numpy()
+        peak = np.maximum.accumulate(eq) if len(eq) else eq
+        wins, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+        return {
+            'trades':        int(len(pnl)),
+            'win_rate':      float((pnl > 0).mean()) if len(pnl) else 0.0,
+            'total_pnl':     float(pnl.sum()),
+            'profit_factor': float(wins / losses) if losses > 0 else float('inf') if wins > 0 else 0.0,
+            'avg_r':         float(trades['r_multiple'].mean()) if len(pnl) else 0.0,
+            'max_drawdown':  float(((peak - eq) / peak).max()) if len(eq) else 0.0,
+            'final_equity':  float(eq[-1]) if len(eq) else float(initial_capital),
+            'ambiguous':     int(trades['ambiguous'].sum()),
+        }
+
+
+def _index(bars) -> pd.DatetimeIndex:
+    # CompactSession keeps int64 timestamps — the others carry an index
+    return bars.index_at() if hasattr(bars, 'index_at') else bars.index
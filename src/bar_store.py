@@ -0,0 +1,200 @@
+"""
+On-disk bar store for SYNAPSE web app.
+Keeps fetched OHLCV bars per symbol/timeframe as memory-mapped NumPy files
+so repeat requests only go to Alpaca for the ranges we don't have yet.
+"""
+
+import io
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .logger import get_logger
+
+logger = get_logger()
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# One record per bar — timestamp as UTC epoch nanoseconds + float64 OHLCV
+BAR_DTYPE = np.dtype([('timestamp', np.int64)] + [(c, np.float64) for c in BAR_COLUMNS])
+
+
+def empty_bars() -> pd.DataFrame:
+    """Empty OHLCV frame with the same shape DataLoader returns."""
+    index = pd.DatetimeIndex([], tz='UTC', name='timestamp')
+    return pd.DataFrame({c: np.array([], dtype=np.float64) for c in BAR_COLUMNS}, index=index)
+
+
+def to_utc_ns(dt) -> int:
+    """Naive datetimes are treated as UTC, the same way Alpaca reads them."""
+    ts = pd.Timestamp(dt)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return int(ts.value)
+
+
+def from_utc_ns(ns: int) -> datetime:
+    """Inverse of to_utc_ns — returns a naive UTC datetime."""
+    return pd.Timestamp(ns, tz='UTC').tz_localize(None).to_pydatetime()
+
+
+def _records(df: pd.DataFrame) -> np.ndarray:
+    """OHLCV frame as BAR_DTYPE records (naive index read as UTC)."""
+    index = df.index
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records['timestamp'] = index.asi8
+    for c in BAR_COLUMNS:
+        records[c] = df[c].to_numpy(dtype=np.float64)
+    return records
+
+
+# .npy header (reader, writer) by format version
+_HEADER_IO = {
+    (1, 0): (np.lib.format.read_array_header_1_0, np.lib.format.write_array_header_1_0),
+    (2, 0): (np.lib.format.read_array_header_2_0, np.lib.format.write_array_header_2_0),
+}
+
+
+def _header(version: tuple, rows: int) -> bytes:
+    """Magic string and header of a .npy file of `rows` BAR_DTYPE records."""
+    buf = io.BytesIO()
+    _HEADER_IO[version][1](buf, {'descr': np.lib.format.dtype_to_descr(BAR_DTYPE),
+                                 'fortran_order': False, 'shape': (rows,)})
+    return buf.getvalue()
+
+
+class BarStore:
+    """
+    Columnar bar cache on disk.
+
+    Layout:  <root>/<SYMBOL>/<timeframe>/bars.npy   structured BAR_DTYPE records
+             <root>/<SYMBOL>/<timeframe>/meta.json  requested range covered
+    The covered range is tracked separately from the first/last bar because
+    nights, weekends and holidays legitimately have no bars.
+    """
+
+    def __init__(self, root: str):
+        self.root   = root
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def lock(self, symbol: str, timeframe: str) -> threading.Lock:
+        """Per symbol/timeframe lock so concurrent requests don't race a write."""
+        key = (symbol, timeframe)
+        with self._guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def coverage(self, symbol: str, timeframe: str) -> Optional[tuple[datetime, datetime]]:
+        """Return the (start, end) range already stored, or None if nothing is."""
+        meta_path = self._path(symbol, timeframe, 'meta.json')
+        if not os.path.exists(meta_path) or not os.path.exists(self._path(symbol, timeframe, 'bars.npy')):
+            return None
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            return from_utc_ns(meta['start']), from_utc_ns(meta['end'])
+        except (OSError, ValueError, KeyError):
+            logger.warning(f"Ignoring unreadable bar store metadata for {symbol} [{timeframe}]")
+            return None
+
+    def read(self, symbol: str, timeframe: str,
+             start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Read stored bars between start and end (inclusive) without loading the whole file."""
+        records = np.load(self._path(symbol, timeframe, 'bars.npy'), mmap_mode='r')
+        ts = records['timestamp']
+
+        lo = 0 if start is None else int(np.searchsorted(ts, to_utc_ns(start), side='left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, to_utc_ns(end), side='right'))
+
+        chunk = np.array(records[lo:hi])
+        del records
+
+        index = pd.DatetimeIndex(pd.to_datetime(chunk['timestamp'], utc=True), name='timestamp')
+        return pd.DataFrame({c: chunk[c] for c in BAR_COLUMNS}, index=index)
+
+    def write(self, symbol: str, timeframe: str, df: pd.DataFrame,
+              start: datetime, end: datetime) -> None:
+        """Replace the stored bars for symbol/timeframe and record the covered range."""
+        directory = os.path.dirname(self._path(symbol, timeframe, 'bars.npy'))
+        os.makedirs(directory, exist_ok=True)
+
+        records = _records(df)
+
+        # Write to temp files and swap in, bars first — a reader that sees the
+        # new bars with the old (narrower) coverage just fetches a little extra
+        self._replace(self._path(symbol, timeframe, 'bars.npy'),
+                      lambda f: np.save(f, records))
+        self._replace(self._path(symbol, timeframe, 'meta.json'),
+                      lambda f: f.write(json.dumps({
+                          'start': to_utc_ns(start),
+                          'end':   to_utc_ns(end),
+                      }).encode()))
+
+        logger.info(f"Bar store updated — {symbol} [{timeframe}] {len(df)} candles")
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame, end: datetime) -> None:
+        """
+        Add bars after the stored ones in place and extend the covered range
+        to end. Stored bars from df's first timestamp on are overwritten (a
+        candle that was still forming). The file only grows and the header
+        goes last, so a reader holding the old header still sees whole
+        records; anything else falls back to a full write.
+        """
+        path    = self._path(symbol, timeframe, 'bars.npy')
+        start   = self.coverage(symbol, timeframe)[0]
+        records = _records(df)
+
+        stored = np.load(path, mmap_mode='r')
+        lo     = int(np.searchsorted(stored['timestamp'], records['timestamp'][0])) if len(records) else len(stored)
+        del stored
+
+        with open(path, 'r+b') as f:
+            version = np.lib.format.read_magic(f)
+            (n,), _, _ = _HEADER_IO[version][0](f)
+            offset = f.tell()
+            header = _header(version, lo + len(records))
+            grows  = lo + len(records) >= n and len(header) == offset
+            if grows:
+                f.seek(offset + lo * BAR_DTYPE.itemsize)
+                f.write(records.tobytes())
+                f.flush()
+                f.seek(0)
+                f.write(header)
+
+        if not grows:
+            merged = pd.concat([self.read(symbol, timeframe), df[BAR_COLUMNS]])
+            self.write(symbol, timeframe, merged[~merged.index.duplicated(keep='last')].sort_index(), start, end)
+            return
+
+        self._replace(self._path(symbol, timeframe, 'meta.json'),
+                      lambda f: f.write(json.dumps({
+                          'start': to_utc_ns(start),
+                          'end':   to_utc_ns(end),
+                      }).encode()))
+
+        logger.info(f"Bar store appended — {symbol} [{timeframe}] {len(records)} candles "
+                    f"({n - lo} replaced)")
+
+    # ------------------------------------------------------------------ #
+    # HELPERS
+    # ------------------------------------------------------------------ #
+
+    def _path(self, symbol: str, timeframe: str, name: str) -> str:
+        return os.path.join(self.root, symbol.upper(), timeframe, name)
+
+    def _replace(self, path: str, write) -> None:
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
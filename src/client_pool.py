@@ -0,0 +1,89 @@
+"""
+Alpaca client pool for SYNAPSE web app.
+Reuses StockHistoricalDataClient instances (and their HTTP sessions) across
+requests from the same credentials so repeat calls skip the TLS handshake.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from alpaca.data.historical import StockHistoricalDataClient
+
+from .logger import get_logger
+
+logger = get_logger()
+
+
+def credential_digest(api_key: str, secret_key: str) -> str:
+    """SHA-256 of the key/secret pair — stands in for the raw credentials as a key."""
+    return hashlib.sha256(f'{api_key}\0{secret_key}'.encode()).hexdigest()
+
+
+class ClientPool:
+    """
+    Bounded, thread-safe LRU of data clients keyed by a credential hash.
+
+    Raw keys are never held as dict keys — only a SHA-256 digest of the
+    key/secret pair. The secret is part of the digest so a request with the
+    right key but wrong secret can't pick up someone else's authenticated client.
+    """
+
+    def __init__(self, max_size: int = 32, idle_seconds: float = 900):
+        self.max_size     = max_size
+        self.idle_seconds = idle_seconds
+        self._clients     = OrderedDict()   # digest -> (client, last_used)
+        self._lock        = threading.Lock()
+
+    def get(self, api_key: str, secret_key: str) -> StockHistoricalDataClient:
+        """Return a warm client for these credentials, creating one if needed."""
+        digest = credential_digest(api_key, secret_key)
+        now    = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+
+            entry = self._clients.pop(digest, None)
+            if entry is not None:
+                client = entry[0]
+            else:
+                client = StockHistoricalDataClient(api_key, secret_key)
+                logger.info(f"Client pool — new client ({len(self._clients) + 1}/{self.max_size})")
+
+            self._clients[digest] = (client, now)
+
+            while len(self._clients) > self.max_size:
+                _, (evicted, _) = self._clients.popitem(last=False)
+                self._close(evicted)
+
+        return client
+
+    def clear(self) -> None:
+        """Close every pooled client."""
+        with self._lock:
+            for client, _ in self._clients.values():
+                self._close(client)
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    # ------------------------------------------------------------------ #
+    # HELPERS
+    # ------------------------------------------------------------------ #
+
+    def _evict_idle(self, now: float) -> None:
+        # Oldest entries sit at the front, so stop at the first fresh one
+        while self._clients:
+            digest, (client, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_seconds:
+                break
+            del self._clients[digest]
+            self._close(client)
+
+    @staticmethod
+    def _close(client) -> None:
+        session = getattr(client, '_session', None)
+        if session is not None:
+            session.close()
@@ -0,0 +1,122 @@
+"""
+Compact in-memory session format for SYNAPSE web app.
+Holds a fully calculated analysis as NumPy blocks instead of a pandas
+DataFrame so each worker can keep many more sessions before eviction.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Everything DecisionEngine and RiskManager read stays float64 so decisions
+# are bit-for-bit the same as on the original DataFrame
+DECISION_COLUMNS = (
+    'close', 'volume', 'vwap',
+    'ema_9', 'ema_21', 'macd', 'macd_signal',
+    'rsx', 'roc', 'cci', 'adx',
+    'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'bb_width_sma',
+    'atr', 'volume_sma', 'obv', 'z_score',
+)
+
+
+class CompactSession:
+    """
+    Struct-of-arrays session: int64 epoch-ns timestamps, one contiguous
+    float64 block for decision columns and one for display-only columns
+    (open/high/low, macd_hist, ...), float32 when compact.
+    Columns are row views into the blocks — nothing is stored twice.
+    """
+
+    def __init__(self, timestamps: np.ndarray, tz: Optional[str],
+                 exact: np.ndarray, exact_names: list,
+                 display: np.ndarray, display_names: list):
+        self.timestamps = timestamps
+        self.tz         = tz
+        self._exact     = exact
+        self._display   = display
+        self._columns   = {}
+        for i, name in enumerate(exact_names):
+            self._columns[name] = exact[i]
+        for i, name in enumerate(display_names):
+            self._columns[name] = display[i]
+        self.column_names = list(exact_names) + list(display_names)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, compact: bool = True) -> 'CompactSession':
+        """Pack an indicator DataFrame or IndicatorFrame. compact=False keeps display columns float64."""
+        exact_names   = [c for c in df.columns if c in DECISION_COLUMNS]
+        display_names = [c for c in df.columns if c not in DECISION_COLUMNS]
+
+        exact   = np.empty((len(exact_names), len(df)), dtype=np.float64)
+        display = np.empty((len(display_names), len(df)),
+                           dtype=np.float32 if compact else np.float64)
+        for i, name in enumerate(exact_names):
+            exact[i] = np.asarray(df[name])
+        for i, name in enumerate(display_names):
+            display[i] = np.asarray(df[name])
+
+        index = df.index
+        tz    = str(index.tz) if index.tz is not None else None
+        return cls(index.asi8.copy(), tz, exact, exact_names, display, display_names)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    __getitem__ = column
+
+    def timestamp(self, idx: int) -> pd.Timestamp:
+        return pd.Timestamp(int(self.timestamps[idx]), tz=self.tz)
+
+    def index_at(self, idx=slice(None)) -> pd.DatetimeIndex:
+        """Timestamps of many rows at once (an index array or slice)."""
+        index = pd.DatetimeIndex(self.timestamps[idx].view('datetime64[ns]'))
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return index
+
+    def timestamp_strings(self, idx=slice(None)) -> list:
+        """str(timestamp(i)) for many rows — formatted by NumPy instead of per-row Timestamps."""
+        index = self.index_at(idx)
+        if len(index) == 0:
+            return []
+        wall  = index.tz_localize(None).asi8 if index.tz is not None else index.asi8
+        if (wall % 1_000_000_000).any():
+            return index.astype(str).tolist()
+
+        text = np.char.replace(np.datetime_as_string(wall.view('datetime64[ns]'), unit='s'), 'T', ' ')
+        if index.tz is None:
+            return text.tolist()
+
+        # UTC offset per row, formatted once per distinct offset
+        minutes     = (wall - index.asi8) // 60_000_000_000
+        offsets, at = np.unique(minutes, return_inverse=True)
+        suffix = np.array([f"{'+' if m >= 0 else '-'}{abs(m) // 60:02d}:{abs(m) % 60:02d}" for m in offsets])
+        return np.char.add(text, suffix[at]).tolist()
+
+    def candle(self, idx: int) -> pd.Series:
+        """One row as a float64 Series — the shape DecisionEngine expects from df.iloc[idx]."""
+        return pd.Series(
+            {name: float(col[idx]) for name, col in self._columns.items()},
+            name=self.timestamp(idx),
+            dtype=np.float64,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild a float64 DataFrame (chart rebuilds, exports)."""
+        index = self.index_at()
+        index.name = 'timestamp'
+        return pd.DataFrame(
+            {name: self._columns[name].astype(np.float64) for name in self.column_names},
+            index=index,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self._exact.nbytes + self._display.nbytes
@@ -3,8 +3,25 @@ Configuration for SYNAPSE web app.
 Built from the request payload instead of .env file.
 """
 
+import hashlib
+import json
+from typing import Optional
+
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
+from .rules import RuleError, bind_params, compile_rule
+
+
+def _layer_number(value) -> Optional[int]:
+    """A layer number given as an int or an integer string (JSON object keys), else None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
 
 class Config:
     """Holds all strategy parameters for a single analysis request."""
@@ -41,6 +58,22 @@ class Config:
         '1Week': 1950,  # 5 trading days
     }
 
+    # Timeframes DataLoader can build locally from 1Min bars in resample mode
+    RESAMPLABLE = {'2Min', '3Min', '5Min', '10Min', '15Min', '30Min',
+                   '1Hour', '2Hour', '4Hour'}
+
+    # Decision tree layers, numbered as in DecisionEngine
+    ALL_LAYERS = (1, 2, 3, 4, 5, 6)
+
+    # Upper bound on watchlist size for /api/scan
+    MAX_SCAN_SYMBOLS = 200
+
+    # Decision payloads — full cards, or codes + raw values with templates sent once
+    RESPONSE_FORMATS = ('full', 'compact')
+
+    # Sides of a layer a custom rule can replace (see decision_engine.LAYER_RULES)
+    RULE_SIDES = ('long', 'short', 'alt')
+
     def __init__(self, payload: dict):
         """
         Initialize from the JSON payload sent by the frontend.
@@ -52,7 +85,13 @@ class Config:
             start_datetime (str, if range_mode == 'daterange'),
             end_datetime   (str, if range_mode == 'daterange'),
             timestamp_mode ('latest' or 'manual'),
-            decision_timestamp (str, if timestamp_mode == 'manual')
+            decision_timestamp (str, if timestamp_mode == 'manual'),
+            symbols (list or comma-separated str, /api/scan only),
+            resample (bool — build the timeframe locally from 1Min bars),
+            layers (list of decision layer numbers to run, default all six),
+            format ('full' or 'compact' decision payloads),
+            rules ({layer: {'long' | 'short' | 'alt': rule text}} overriding
+                   the built-in layer conditions, see src.rules)
         """
 
         # Credentials
@@ -63,17 +102,27 @@ class Config:
         self.symbol        = payload.get('symbol', 'SPY').upper()
         self.timeframe_str = payload.get('timeframe', '1Min')
 
+        # Watchlist for /api/scan — accepts a list or "SPY, QQQ, AAPL"
+        symbols = payload.get('symbols') or []
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        self.symbols = list(dict.fromkeys(
+            str(s).strip().upper() for s in symbols if str(s).strip()
+        ))
+
         # Map timeframe string to Alpaca TimeFrame object
         self.timeframe = self.TIMEFRAME_MAP.get(self.timeframe_str, TimeFrame.Minute)
 
+        # Resample mode — fetch 1Min once and aggregate locally
+        self.resample = bool(payload.get('resample', False))
+
         # Data range
         self.range_mode = payload.get('range_mode', 'lookback')
         self.candles    = int(payload.get('lookback', 500))
 
-        # Convert candles → minutes for the fetch call
-        mins_per_candle     = self.TIMEFRAME_MINUTES.get(self.timeframe_str, 1)
-        # Add 40% buffer to account for market hours gaps (nights, weekends)
-        self.minutes_lookback = int(self.candles * mins_per_candle * 1.4)
+        # Minutes per candle — DataLoader walks the trading calendar back
+        # from now with this to find the exact start for `candles` bars
+        self.mins_per_candle = self.TIMEFRAME_MINUTES.get(self.timeframe_str, 1)
 
         self.start_datetime = payload.get('start_datetime', None)
         self.end_datetime   = payload.get('end_datetime', None)
@@ -87,6 +136,14 @@ class Config:
         self.base_tp_atr_multiple    = 3.0
         self.partial_exit_1_ratio    = 1.5
         self.partial_exit_2_ratio    = 2.5
+        self.partial_exit_1_size     = 1 / 3   # share of the position closed at each partial
+        self.partial_exit_2_size     = 1 / 3
+
+        # Portfolio sizing — share of equity risked per trade (to the stop),
+        # open positions at once, and the largest position as a share of equity
+        self.risk_per_trade   = 0.01
+        self.max_positions    = 10
+        self.max_position_pct = 0.2
 
         # ── Decision tree thresholds ─────────────────────────────────
         self.adx_threshold               = 25.0
@@ -116,6 +173,18 @@ class Config:
 
         self.min_warmup_candles = 100
 
+        # ── Decision layers to run (1–6) ─────────────────────────────
+        # Disabled layers are skipped and their indicators never computed.
+        # Kept as sent; validate() checks the numbers and sorts them
+        self.enabled_layers = payload.get('layers') or list(self.ALL_LAYERS)
+
+        # Custom layer rules — replace any side of a built-in layer.
+        # Kept as sent; validate() checks the shape and keys them by int
+        self.rules = payload.get('rules') or {}
+
+        # ── Response format ──────────────────────────────────────────
+        self.response_format = payload.get('format', 'full')
+
     def validate(self) -> tuple[bool, str]:
         """
         Validate the config. Returns (is_valid, error_message).
@@ -138,7 +207,66 @@ class Config:
             if not self.start_datetime or not self.end_datetime:
                 return False, 'Start and end datetime are required for date range mode.'
 
+        if not isinstance(self.enabled_layers, (list, tuple)):
+            return False, 'Decision layers must be a list of layer numbers.'
+        layers = {_layer_number(n) for n in self.enabled_layers}
+        if not layers <= set(self.ALL_LAYERS):
+            return False, f'Decision layers must be between 1 and {len(self.ALL_LAYERS)}.'
+        self.enabled_layers = sorted(layers)
+
         if self.timestamp_mode == 'manual' and not self.decision_timestamp:
             return False, 'A decision timestamp is required when using manual mode.'
 
+        if self.response_format not in self.RESPONSE_FORMATS:
+            return False, f'Invalid format: {self.response_format}'
+
+        if not isinstance(self.rules, dict):
+            return False, 'Rules must map layer numbers to long / short / alt rule text.'
+        rules = {}
+        for key, sides in self.rules.items():
+            layer = _layer_number(key)
+            if layer not in self.ALL_LAYERS:
+                return False, f'Rules given for unknown layer {key}.'
+            if not isinstance(sides, dict):
+                return False, f'Layer {layer} rules must map long / short / alt to rule text.'
+            for side, text in sides.items():
+                if side not in self.RULE_SIDES or not isinstance(text, str):
+                    return False, f'Layer {layer} rules must map long / short / alt to rule text.'
+                try:
+                    bind_params(compile_rule(text).params, self)
+                except RuleError as e:
+                    return False, f'Layer {layer} {side} rule: {e}'
+            rules[layer] = dict(sides)
+        self.rules = rules
+
+        return True, ''
+
+    def fingerprint(self) -> str:
+        """
+        Canonical hash of every field that affects an analysis result.
+        Credentials are left out — callers that share results across
+        requests add client_pool.credential_digest to the key so only the
+        same credentials share a fetch. timeframe_str stands in for the
+        TimeFrame object. response_format only changes how the shared
+        result is serialised.
+        """
+        fields = {
+            k: v for k, v in vars(self).items()
+            if k not in ('api_key', 'secret_key', 'timeframe', 'response_format')
+        }
+        canonical = json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def validate_scan(self) -> tuple[bool, str]:
+        """Extra checks for the multi-symbol /api/scan endpoint."""
+        valid, msg = self.validate()
+        if not valid:
+            return valid, msg
+
+        if not self.symbols:
+            return False, 'At least one symbol is required for a scan.'
+
+        if len(self.symbols) > self.MAX_SCAN_SYMBOLS:
+            return False, f'A scan is limited to {self.MAX_SCAN_SYMBOLS} symbols.'
+
         return True, ''
\ No newline at end of file
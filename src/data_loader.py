@@ -5,23 +5,52 @@ Fetch behavior is identical to the original code — only the inputs differ.
 
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
 
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
+from .bar_store import BarStore, BAR_COLUMNS, empty_bars, to_utc_ns
+from .config import Config
 from .logger import get_logger
+from .market_calendar import lookback_start, trading_between
+from .resample import resample_bars
 
 logger = get_logger()
 
 MIN_WARMUP_CANDLES = 100
 
+# Large ranges are split into windows of roughly one Alpaca page each
+# (page_size is 10k bars) and fetched concurrently
+WINDOW_BARS   = 10_000
+FETCH_WORKERS = 4
+
+# Upper bound of bar-minutes per calendar day — 4:00–20:00 ET extended hours
+EXTENDED_MINUTES_PER_DAY = 16 * 60
+
+# Wall-clock length of one bar per timeframe unit (a month at its shortest)
+BAR_UNIT = {
+    TimeFrameUnit.Minute: timedelta(minutes=1),
+    TimeFrameUnit.Hour:   timedelta(hours=1),
+    TimeFrameUnit.Day:    timedelta(days=1),
+    TimeFrameUnit.Week:   timedelta(weeks=1),
+    TimeFrameUnit.Month:  timedelta(days=28),
+}
+
 
 class DataLoader:
 
-    def __init__(self, api_key: str, secret_key: str):
-        self.client = StockHistoricalDataClient(api_key, secret_key)
+    def __init__(self, api_key: str, secret_key: str, store: Optional[BarStore] = None,
+                 client: Optional[StockHistoricalDataClient] = None,
+                 progress: Optional[Callable[[int, int], None]] = None):
+        # A pooled client can be passed in to reuse its warm HTTP session
+        self.client   = client or StockHistoricalDataClient(api_key, secret_key)
+        self.store    = store
+        # Called as progress(windows_done, windows_total) during windowed fetches
+        self.progress = progress
 
     def fetch(self, config) -> pd.DataFrame:
         if config.range_mode == 'lookback':
@@ -29,32 +58,173 @@ class DataLoader:
         else:
             return self._fetch_by_daterange(config)
 
+    def fetch_many(self, config, symbols: list) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch several symbols with one batched StockBarsRequest and split
+        the MultiIndex frame once. Symbols with no bars are left out.
+        """
+        start_date, end_date = self._window(config)
+
+        logger.info(f"Fetching {len(symbols)} symbols [{config.timeframe_str}] "
+                    f"from {start_date} to {end_date}")
+
+        request_params = StockBarsRequest(
+            symbol_or_symbols=list(symbols),
+            timeframe=config.timeframe,
+            start=start_date,
+            end=end_date
+        )
+
+        df = self.client.get_stock_bars(request_params).df
+        if df.empty:
+            return {}
+
+        df = df.astype({c: np.float64 for c in BAR_COLUMNS})
+
+        frames = {}
+        for symbol, group in df.groupby(level='symbol', sort=False):
+            frames[symbol] = self._trim(group.droplevel('symbol').sort_index(), config)
+
+        logger.info(f"Successfully fetched {len(df)} candles for {len(frames)} symbols")
+        return frames
+
+    def _window(self, config) -> tuple[datetime, datetime]:
+        """Start/end datetimes for the config's range mode."""
+        if config.range_mode == 'lookback':
+            end_date   = datetime.now()
+            start_date = lookback_start(end_date, config.candles,
+                                       config.timeframe_str, config.mins_per_candle)
+            return start_date, end_date
+
+        start_date = datetime.fromisoformat(config.start_datetime).replace(tzinfo=None)
+        end_date   = datetime.fromisoformat(config.end_datetime).replace(tzinfo=None)
+        return start_date, end_date
+
+    def _trim(self, df: pd.DataFrame, config) -> pd.DataFrame:
+        """Keep exactly the last `candles` bars in lookback mode."""
+        if config.range_mode != 'lookback':
+            return df
+        return df.iloc[-config.candles:]
+
     def _fetch_by_lookback(self, config) -> pd.DataFrame:
         """
-        Exact replica of the original fetch_data method.
-        candles_back is used as minutes to go back, identical to original.
+        Start is worked out from the trading calendar so the window holds
+        `candles` bars (nights, weekends and holidays skipped), then the
+        result is trimmed to exactly that many.
         """
-        end_date   = datetime.now()
-        start_date = end_date - timedelta(minutes=config.minutes_lookback)
+        start_date, end_date = self._window(config)
 
         logger.info(f"Fetching {config.symbol} [{config.timeframe_str}] "
                     f"from {start_date} to {end_date} "
                     f"({config.candles} candles requested)")
 
-        return self._request(config.symbol, config.timeframe, start_date, end_date)
+        return self._trim(self._load_bars(config, start_date, end_date), config)
 
     def _fetch_by_daterange(self, config) -> pd.DataFrame:
         """
         Fetch between two explicit datetimes provided by the user.
         Strips timezone to keep naive datetimes consistent with original.
         """
-        start_date = datetime.fromisoformat(config.start_datetime).replace(tzinfo=None)
-        end_date   = datetime.fromisoformat(config.end_datetime).replace(tzinfo=None)
+        start_date, end_date = self._window(config)
 
         logger.info(f"Fetching {config.symbol} [{config.timeframe_str}] "
                     f"from {start_date} to {end_date}")
 
-        return self._request(config.symbol, config.timeframe, start_date, end_date)
+        return self._load_bars(config, start_date, end_date)
+
+    def _load_bars(self, config, start: datetime, end: datetime) -> pd.DataFrame:
+        """
+        Bars at the config's timeframe. In resample mode intraday timeframes
+        are aggregated locally from (stored) 1Min bars instead of being
+        requested from Alpaca one timeframe at a time.
+        """
+        if not (config.resample and config.timeframe_str in config.RESAMPLABLE):
+            return self._load(config.symbol, config.timeframe, start, end)
+
+        base = self._load(config.symbol, TimeFrame.Minute, start, end)
+        df   = resample_bars(base, config.TIMEFRAME_MINUTES[config.timeframe_str])
+
+        # The first bucket is partial when the window starts mid-bucket
+        df = df[df.index >= pd.Timestamp(to_utc_ns(start), tz='UTC')]
+
+        logger.info(f"Resampled {len(base)} 1Min candles → {len(df)} "
+                    f"{config.timeframe_str} candles")
+        return df
+
+    def _load(self, symbol: str, timeframe: TimeFrame,
+              start: datetime, end: datetime) -> pd.DataFrame:
+        """
+        Serve bars from the local store when one is attached, only asking
+        Alpaca for the head/tail ranges the store doesn't cover yet.
+        Without a store this is a plain _request.
+        """
+        if self.store is None:
+            return self._request(symbol, timeframe, start, end)
+
+        key = timeframe.value
+        with self.store.lock(symbol, key):
+            coverage = self.store.coverage(symbol, key)
+
+            # Nothing stored, or no overlap — a gap in the middle would
+            # break the contiguous-coverage assumption, so start over
+            if coverage is None or end < coverage[0] or start > coverage[1]:
+                df = self._request(symbol, timeframe, start, end)[BAR_COLUMNS]
+                self.store.write(symbol, key, df, start, end)
+                return df
+
+            cov_start, cov_end = coverage
+            stored = self.store.read(symbol, key)
+            head   = empty_bars()
+            tail   = empty_bars()
+
+            # Lookback mode always ends at now — less than a bar later, or
+            # with the market shut since, there's nothing new to fetch
+            fetch_head = start < cov_start
+            fetch_tail = (end > cov_end and end - cov_end >= timeframe.amount * BAR_UNIT[timeframe.unit]
+                          and trading_between(cov_end, end))
+
+            if fetch_head:
+                head = self._download(symbol, timeframe, start, cov_start)
+
+            if fetch_tail:
+                # Re-pull from the last stored bar so a candle that was
+                # still forming on the previous fetch gets replaced
+                tail_start = cov_end
+                if not stored.empty:
+                    tail_start = min(cov_end, stored.index[-1].tz_localize(None).to_pydatetime())
+                tail = self._download(symbol, timeframe, tail_start, end)
+
+            if fetch_head:
+                logger.info(f"Bar store gap-fill for {symbol} [{key}] — "
+                            f"{len(head)} head / {len(tail)} tail candles fetched")
+                merged = pd.concat([head[BAR_COLUMNS], stored, tail[BAR_COLUMNS]])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                self.store.write(symbol, key, merged,
+                                 min(start, cov_start), max(end, cov_end) if fetch_tail else cov_end)
+            elif fetch_tail:
+                # Only new bars at the end — append them instead of rewriting the file
+                logger.info(f"Bar store gap-fill for {symbol} [{key}] — {len(tail)} tail candles fetched")
+                self.store.append(symbol, key, tail, end)
+                merged = pd.concat([stored, tail[BAR_COLUMNS]])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            else:
+                logger.info(f"Bar store hit for {symbol} [{key}] — no fetch needed")
+                merged = stored
+
+        ts = merged.index.asi8
+        lo = int(np.searchsorted(ts, to_utc_ns(start), side='left'))
+        hi = int(np.searchsorted(ts, to_utc_ns(end), side='right'))
+        df = merged.iloc[lo:hi]
+
+        if df.empty:
+            raise ValueError(
+                f'No data returned for {symbol}. '
+                f'Check that the market was open during the requested period.'
+            )
+
+        logger.info(f"Loaded {len(df)} candles")
+        logger.info(f"Date range: {df.index[0]} to {df.index[-1]}")
+        return df
 
     def _request(self, symbol: str, timeframe: TimeFrame,
                  start: datetime, end: datetime) -> pd.DataFrame:
@@ -62,6 +232,71 @@ class DataLoader:
         Identical request logic to the original — no feed override,
         no timezone manipulation.
         """
+        df = self._download(symbol, timeframe, start, end)
+
+        if df.empty:
+            raise ValueError(
+                f'No data returned for {symbol}. '
+                f'Check that the market was open during the requested period.'
+            )
+
+        logger.info(f"Successfully fetched {len(df)} candles")
+        logger.info(f"Date range: {df.index[0]} to {df.index[-1]}")
+        return df
+
+    def _download(self, symbol: str, timeframe: TimeFrame,
+                  start: datetime, end: datetime) -> pd.DataFrame:
+        """
+        Bars between start and end, normalised to float64 OHLCV.
+        Returns an empty frame instead of raising — an empty head/tail
+        range (weekend, holiday) is normal when gap-filling the store.
+
+        Ranges longer than one window are fetched as parallel windows
+        instead of one call the SDK would paginate serially.
+        """
+        windows = self._split_windows(timeframe, start, end)
+        if len(windows) == 1:
+            return self._download_window(symbol, timeframe, start, end)
+
+        logger.info(f"Fetching {symbol} [{timeframe.value}] in {len(windows)} windows")
+
+        frames = [None] * len(windows)
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(windows))) as pool:
+            futures = {
+                pool.submit(self._download_window, symbol, timeframe, w_start, w_end): i
+                for i, (w_start, w_end) in enumerate(windows)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                frames[futures[future]] = future.result()
+                if self.progress is not None:
+                    self.progress(done, len(windows))
+
+        # Windows share their boundary timestamp — stitch in order and dedupe
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return empty_bars()
+
+        df = pd.concat(frames)
+        return df[~df.index.duplicated(keep='last')]
+
+    def _split_windows(self, timeframe: TimeFrame,
+                       start: datetime, end: datetime) -> list:
+        """Cut [start, end] into consecutive windows of about WINDOW_BARS bars."""
+        minutes = Config.TIMEFRAME_MINUTES.get(timeframe.value, 1)
+        span    = timedelta(days=max(1, WINDOW_BARS * minutes // EXTENDED_MINUTES_PER_DAY))
+
+        windows = []
+        w_start = start
+        while w_start < end:
+            w_end = min(w_start + span, end)
+            windows.append((w_start, w_end))
+            w_start = w_end
+
+        return windows or [(start, end)]
+
+    def _download_window(self, symbol: str, timeframe: TimeFrame,
+                         start: datetime, end: datetime) -> pd.DataFrame:
+        """One get_stock_bars call, normalised to float64 OHLCV."""
         request_params = StockBarsRequest(
             symbol_or_symbols=symbol,
             timeframe=timeframe,
@@ -73,10 +308,7 @@ class DataLoader:
         df = bars.df
 
         if df.empty:
-            raise ValueError(
-                f'No data returned for {symbol}. '
-                f'Check that the market was open during the requested period.'
-            )
+            return empty_bars()
 
         # Handle multi-index exactly as original
         if isinstance(df.index, pd.MultiIndex):
@@ -86,16 +318,7 @@ class DataLoader:
             df = df.drop('symbol', axis=1)
 
         # Ensure float64 for TA-Lib, exactly as original
-        df = df.astype({
-            'open':   np.float64,
-            'high':   np.float64,
-            'low':    np.float64,
-            'close':  np.float64,
-            'volume': np.float64
-        })
-
-        logger.info(f"Successfully fetched {len(df)} candles")
-        logger.info(f"Date range: {df.index[0]} to {df.index[-1]}")
+        df = df.astype({c: np.float64 for c in BAR_COLUMNS})
 
         df.sort_index(inplace=True)
         return df
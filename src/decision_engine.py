@@ -9,15 +9,166 @@ from typing import Dict, Optional
 
 from .logger import get_logger
 from .config import Config
+from .rules import compile_rule, gather, bind_params
 
 logger = get_logger()
 
+# Columns every decision reads — the validity check, the EMA trend used by
+# layers 1/3/5, and what RiskManager needs for a TRADE
+BASE_COLUMNS = ('close', 'ema_9', 'ema_21', 'adx', 'atr', 'z_score')
+
+# Extra columns each layer displays (rule columns are added on top)
+LAYER_COLUMNS = {
+    1: ('macd', 'macd_signal', 'vwap'),
+    2: ('rsx', 'roc', 'cci'),
+    3: (),
+    4: ('bb_width', 'bb_width_sma', 'bb_upper', 'bb_middle', 'bb_lower'),
+    5: ('volume', 'volume_sma', 'obv'),
+    6: (),
+}
+
+# Built-in layer rules (src.rules syntax). Config.rules overrides any side
+# of any layer. 'alt' marks the fourth state: it holds where neither long
+# nor short does. Names that aren't columns are Config thresholds;
+# `prev(obv) == prev(obv)` is false on the first candle (NaN never equals).
+LAYER_RULES = {
+    1: {'long':  'ema_9 > ema_21 AND macd > macd_signal AND macd > 0 AND close > vwap',
+        'short': 'ema_9 < ema_21 AND macd < macd_signal AND macd < 0 AND close < vwap'},
+    2: {'long':  '(rsx < rsi_oversold AND roc > roc_strong_threshold) OR cci > cci_threshold',
+        'short': '(rsx > rsi_overbought AND roc < -roc_strong_threshold) OR cci < -cci_threshold'},
+    3: {'long':  'adx >= adx_threshold AND ema_9 > ema_21',
+        'short': 'adx >= adx_threshold AND ema_9 < ema_21'},
+    4: {'long':  'bb_width > bb_width_sma * bb_width_expansion_factor '
+                 'AND close > bb_middle AND close < bb_upper',
+        'short': 'bb_width > bb_width_sma * bb_width_expansion_factor '
+                 'AND close < bb_middle AND close > bb_lower'},
+    5: {'long':  'volume > volume_sma * volume_participation_factor AND obv > prev(obv) AND ema_9 > ema_21',
+        'short': 'volume > volume_sma * volume_participation_factor AND obv <= prev(obv) AND ema_9 < ema_21',
+        'alt':   'volume > volume_sma * volume_participation_factor AND prev(obv) == prev(obv)'},
+    6: {'long':  'z_score > z_score_extreme_threshold',
+        'short': 'z_score < -z_score_extreme_threshold'},
+}
+
+# Names the layers use -> indicator column
+_EXTRACT_COLUMNS = {
+    'ema_9':        'ema_9',
+    'ema_21':       'ema_21',
+    'macd':         'macd',
+    'macd_signal':  'macd_signal',
+    'close':        'close',
+    'vwap':         'vwap',
+    'rsi':          'rsx',
+    'roc':          'roc',
+    'cci':          'cci',
+    'adx':          'adx',
+    'bb_width':     'bb_width',
+    'bb_width_sma': 'bb_width_sma',
+    'bb_upper':     'bb_upper',
+    'bb_middle':    'bb_middle',
+    'bb_lower':     'bb_lower',
+    'volume':       'volume',
+    'volume_sma':   'volume_sma',
+    'z_score':      'z_score',
+    'atr':          'atr',
+    'obv':          'obv',
+}
+
+# Outcome codes of make_decisions — index into OUTCOME_REASONS
+TRADE, NO_CONDITIONS, CONFLICT, INSUFFICIENT = range(4)
+OUTCOME_REASONS = ('Trade', 'No conditions met', 'Conflicting signals', 'Insufficient indicator data')
+
+# Per-layer state codes — index into LAYER_OUTCOMES[layer]
+STATE_NONE, STATE_LONG, STATE_SHORT, STATE_NONE_ALT = range(4)
+
+# (result, direction, reason) of each layer state
+LAYER_OUTCOMES = {
+    1: (('NO TRADE', 'NONE',  'Trend not aligned'),
+        ('TRADE',    'LONG',  'Trend Direction Aligned (Bullish)'),
+        ('TRADE',    'SHORT', 'Trend Direction Aligned (Bearish)')),
+    2: (('NO TRADE', 'NONE',  'Momentum not strong'),
+        ('TRADE',    'LONG',  'Momentum Quality Strong (Bullish)'),
+        ('TRADE',    'SHORT', 'Momentum Quality Strong (Bearish)')),
+    3: (('NO TRADE', 'NONE',  'Weak trend'),
+        ('TRADE',    'LONG',  'Trend Strength >= 25 (Bullish)'),
+        ('TRADE',    'SHORT', 'Trend Strength >= 25 (Bearish)')),
+    4: (('NO TRADE', 'NONE',  'Volatility not expanding'),
+        ('TRADE',    'LONG',  'Volatility Expanding (Bullish)'),
+        ('TRADE',    'SHORT', 'Volatility Expanding (Bearish)')),
+    5: (('NO TRADE', 'NONE',  'Volume not sufficient'),
+        ('TRADE',    'LONG',  'Volume Participation Good (Bullish)'),
+        ('TRADE',    'SHORT', 'Volume Participation Good (Bearish)'),
+        ('NO TRADE', 'NONE',  'Volume direction conflicts with trend')),
+    6: (('NO TRADE', 'NONE',  'No statistical extreme'),
+        ('TRADE',    'LONG',  'Statistical Edge Extreme (Bullish)'),
+        ('TRADE',    'SHORT', 'Statistical Edge Extreme (Bearish)')),
+}
+
+LAYER_NAMES = {
+    1: 'Trend Alignment',
+    2: 'Momentum Quality',
+    3: 'Trend Strength',
+    4: 'Volatility Expansion',
+    5: 'Volume Participation',
+    6: 'Statistical Edge',
+}
+
+# Values on each layer card — label: (indicator key, format spec)
+LAYER_DISPLAY = {
+    1: {'EMA 9':        ('ema_9',        '.2f'),
+        'EMA 21':       ('ema_21',       '.2f'),
+        'MACD':         ('macd',         '.4f'),
+        'MACD Signal':  ('macd_signal',  '.4f'),
+        'Close':        ('close',        '.2f'),
+        'VWAP':         ('vwap',         '.2f')},
+    2: {'RSI':          ('rsi',          '.2f'),
+        'ROC':          ('roc',          '.2f'),
+        'CCI':          ('cci',          '.2f')},
+    3: {'ADX':          ('adx',          '.2f'),
+        'EMA 9':        ('ema_9',        '.2f'),
+        'EMA 21':       ('ema_21',       '.2f')},
+    4: {'BB Width':     ('bb_width',     '.4f'),
+        'BB Width SMA': ('bb_width_sma', '.4f'),
+        'BB Upper':     ('bb_upper',     '.2f'),
+        'BB Middle':    ('bb_middle',    '.2f'),
+        'BB Lower':     ('bb_lower',     '.2f'),
+        'Close':        ('close',        '.2f')},
+    5: {'Volume':       ('volume',       ',.0f'),
+        'Volume SMA':   ('volume_sma',   ',.0f'),
+        'OBV':          ('obv',          ',.0f'),
+        'Prev OBV':     ('prev_obv',     ',.0f')},
+    6: {'Z-Score':      ('z_score',      '.4f'),
+        'ATR':          ('atr',          '.4f')},
+}
+
 
 class DecisionEngine:
 
     def __init__(self, config: Config):
         self.config = config
 
+        # Compiled once per rule text (cached in src.rules), params bound now
+        self.rules = {
+            n: {side: compile_rule(text) for side, text in {**LAYER_RULES[n], **config.rules.get(n, {})}.items()}
+            for n in config.enabled_layers
+        }
+        self._params = {
+            n: {side: bind_params(rule.params, config) for side, rule in sides.items()}
+            for n, sides in self.rules.items()
+        }
+
+    def required_columns(self) -> list:
+        """Columns the enabled layers need — pass to IndicatorCalculator.calculate."""
+        columns = list(BASE_COLUMNS)
+        for n in self.config.enabled_layers:
+            columns.extend(c for c in LAYER_COLUMNS[n] if c not in columns)
+            for rule in self.rules[n].values():
+                columns.extend(c for c in rule.columns if c not in columns)
+        return columns
+
+    def rule_columns(self) -> list:
+        """Columns the enabled layers' rules read."""
+        return sorted({c for sides in self.rules.values() for rule in sides.values() for c in rule.columns})
+
     def make_decision(self, candle: pd.Series, prev_obv: Optional[float] = None) -> Dict:
         """
         Run all 6 layers and return a full result dict including
@@ -28,17 +179,23 @@ class DecisionEngine:
         if not self._validate(indicators):
             return self._build_result([], 'NO TRADE', 'NONE', 'Insufficient indicator data')
 
-        ema_bullish = indicators['ema_9'] > indicators['ema_21']
-        ema_bearish = indicators['ema_9'] < indicators['ema_21']
+        return self.describe(candle, prev_obv, self._states_at(candle, prev_obv))
+
+    def describe(self, candle, prev_obv: Optional[float], states: Dict[int, int]) -> Dict:
+        """
+        The make_decision result for one candle whose layer states are
+        already known (layer_states / DecisionTimeline) — formatting only.
+        candle is a Series or a plain {column: value} dict.
+        """
+        indicators = self._extract(candle)
+
+        if not self._validate(indicators):
+            return self._build_result([], 'NO TRADE', 'NONE', 'Insufficient indicator data')
 
-        layers = [
-            self._layer_trend_alignment(indicators, ema_bullish, ema_bearish),
-            self._layer_momentum(indicators),
-            self._layer_trend_strength(indicators, ema_bullish, ema_bearish),
-            self._layer_volatility(indicators),
-            self._layer_volume(indicators, prev_obv, ema_bullish, ema_bearish),
-            self._layer_statistical(indicators),
-        ]
+        indicators['prev_obv'] = prev_obv
+        conditions = self.condition_text()
+        layers = [self._layer_card(n, indicators, states[n], conditions[n])
+                  for n in self.config.enabled_layers]
 
         # Only layers that fired a trade signal
         fired = [l for l in layers if l['result'] == 'TRADE']
@@ -54,207 +211,205 @@ class DecisionEngine:
         reason    = ', '.join(l['reason'] for l in fired)
         return self._build_result(layers, 'TRADE', direction, reason, indicators)
 
-    # ------------------------------------------------------------------ #
-    # LAYER BUILDERS
-    # ------------------------------------------------------------------ #
-
-    def _layer_trend_alignment(self, ind, ema_bull, ema_bear):
-        macd_bull  = ind['macd'] > ind['macd_signal'] and ind['macd'] > 0
-        macd_bear  = ind['macd'] < ind['macd_signal'] and ind['macd'] < 0
-        vwap_bull  = ind['close'] > ind['vwap']
-        vwap_bear  = ind['close'] < ind['vwap']
-
-        if ema_bull and macd_bull and vwap_bull:
-            result, direction, reason = 'TRADE', 'LONG', 'Trend Direction Aligned (Bullish)'
-        elif ema_bear and macd_bear and vwap_bear:
-            result, direction, reason = 'TRADE', 'SHORT', 'Trend Direction Aligned (Bearish)'
+    def raw_decision(self, candle, prev_obv: Optional[float] = None,
+                     states: Optional[Dict[int, int]] = None) -> Dict:
+        """
+        Compact make_decision — codes and raw floats, no display strings.
+        Pair with templates() (sent once) to render it client-side.
+
+            signal  — 1 / -1 / 0
+            outcome — index into templates()['outcome_reasons']
+            fired   — bitmask, bit n - 1 set when layer n fired
+            states  — per enabled layer, index into that layer's outcomes
+            values  — the indicator values the enabled layers display (NaN -> None)
+        """
+        indicators = self._extract(candle)
+        valid      = self._validate(indicators)
+        if valid and states is None:
+            states = self._states_at(candle, prev_obv)
+
+        layers = self.config.enabled_layers if valid else []
+        longs  = [n for n in layers if states[n] == STATE_LONG]
+        shorts = [n for n in layers if states[n] == STATE_SHORT]
+
+        if not valid:
+            outcome = INSUFFICIENT
+        elif longs and shorts:
+            outcome = CONFLICT
+        elif longs or shorts:
+            outcome = TRADE
         else:
-            result, direction, reason = 'NO TRADE', 'NONE', 'Trend not aligned'
+            outcome = NO_CONDITIONS
 
-        return {
-            'layer':     1,
-            'name':      'Trend Alignment',
-            'result':    result,
-            'direction': direction,
-            'reason':    reason,
-            'indicators': {
-                'EMA 9':        f"{ind['ema_9']:.2f}",
-                'EMA 21':       f"{ind['ema_21']:.2f}",
-                'MACD':         f"{ind['macd']:.4f}",
-                'MACD Signal':  f"{ind['macd_signal']:.4f}",
-                'Close':        f"{ind['close']:.2f}",
-                'VWAP':         f"{ind['vwap']:.2f}",
-            },
-            'long_condition':  'EMA9 > EMA21  AND  MACD > Signal AND > 0  AND  Close > VWAP',
-            'short_condition': 'EMA9 < EMA21  AND  MACD < Signal AND < 0  AND  Close < VWAP',
-        }
-
-    def _layer_momentum(self, ind):
-        rsi_os   = ind['rsi'] < self.config.rsi_oversold
-        rsi_ob   = ind['rsi'] > self.config.rsi_overbought
-        roc_pos  = ind['roc'] > self.config.roc_strong_threshold
-        roc_neg  = ind['roc'] < -self.config.roc_strong_threshold
-        cci_bull = ind['cci'] > self.config.cci_threshold
-        cci_bear = ind['cci'] < -self.config.cci_threshold
-
-        if (rsi_os and roc_pos) or cci_bull:
-            result, direction, reason = 'TRADE', 'LONG', 'Momentum Quality Strong (Bullish)'
-        elif (rsi_ob and roc_neg) or cci_bear:
-            result, direction, reason = 'TRADE', 'SHORT', 'Momentum Quality Strong (Bearish)'
-        else:
-            result, direction, reason = 'NO TRADE', 'NONE', 'Momentum not strong'
+        indicators['prev_obv'] = prev_obv
+        keys = {'close', 'atr', 'z_score'}
+        for n in self.config.enabled_layers:
+            keys.update(key for key, _ in LAYER_DISPLAY[n].values())
 
         return {
-            'layer':     2,
-            'name':      'Momentum Quality',
-            'result':    result,
-            'direction': direction,
-            'reason':    reason,
-            'indicators': {
-                'RSI':  f"{ind['rsi']:.2f}",
-                'ROC':  f"{ind['roc']:.2f}",
-                'CCI':  f"{ind['cci']:.2f}",
-            },
-            'long_condition':  f"(RSI < {self.config.rsi_oversold} AND ROC > {self.config.roc_strong_threshold})  OR  CCI > {self.config.cci_threshold}",
-            'short_condition': f"(RSI > {self.config.rsi_overbought} AND ROC < -{self.config.roc_strong_threshold})  OR  CCI < -{self.config.cci_threshold}",
+            'signal':  (1 if longs else -1) if outcome == TRADE else 0,
+            'outcome': outcome,
+            'fired':   sum(1 << (n - 1) for n in longs + shorts),
+            'states':  [states[n] for n in layers],
+            'values':  {k: _raw(indicators[k]) for k in sorted(keys)},
         }
 
-    def _layer_trend_strength(self, ind, ema_bull, ema_bear):
-        strong = ind['adx'] >= self.config.adx_threshold
-
-        if strong and ema_bull:
-            result, direction, reason = 'TRADE', 'LONG',  'Trend Strength >= 25 (Bullish)'
-        elif strong and ema_bear:
-            result, direction, reason = 'TRADE', 'SHORT', 'Trend Strength >= 25 (Bearish)'
-        else:
-            result, direction, reason = 'NO TRADE', 'NONE', 'Weak trend'
-
+    def templates(self) -> Dict:
+        """Everything raw_decision leaves out — names, labels, condition text and reasons."""
+        conditions = self.condition_text()
         return {
-            'layer':     3,
-            'name':      'Trend Strength',
-            'result':    result,
-            'direction': direction,
-            'reason':    reason,
-            'indicators': {
-                'ADX':   f"{ind['adx']:.2f}",
-                'EMA 9': f"{ind['ema_9']:.2f}",
-                'EMA 21':f"{ind['ema_21']:.2f}",
-            },
-            'long_condition':  f"ADX >= {self.config.adx_threshold}  AND  EMA9 > EMA21",
-            'short_condition': f"ADX >= {self.config.adx_threshold}  AND  EMA9 < EMA21",
+            'outcome_reasons': list(OUTCOME_REASONS),
+            'layers': [
+                {
+                    'layer':           n,
+                    'name':            LAYER_NAMES[n],
+                    'indicators':      {label: list(spec) for label, spec in LAYER_DISPLAY[n].items()},
+                    'outcomes':        [list(o) for o in LAYER_OUTCOMES[n]],
+                    'long_condition':  conditions[n][0],
+                    'short_condition': conditions[n][1],
+                }
+                for n in self.config.enabled_layers
+            ],
         }
 
-    def _layer_volatility(self, ind):
-        expanding = ind['bb_width'] > ind['bb_width_sma'] * self.config.bb_width_expansion_factor
-        above_mid = ind['close'] > ind['bb_middle'] and ind['close'] < ind['bb_upper']
-        below_mid = ind['close'] < ind['bb_middle'] and ind['close'] > ind['bb_lower']
+    def condition_text(self) -> Dict[int, tuple]:
+        """(long, short) condition text shown on each layer card — rule text where overridden."""
+        c = self.config
+        text = {
+            1: ('EMA9 > EMA21  AND  MACD > Signal AND > 0  AND  Close > VWAP',
+                'EMA9 < EMA21  AND  MACD < Signal AND < 0  AND  Close < VWAP'),
+            2: (f"(RSI < {c.rsi_oversold} AND ROC > {c.roc_strong_threshold})  OR  CCI > {c.cci_threshold}",
+                f"(RSI > {c.rsi_overbought} AND ROC < -{c.roc_strong_threshold})  OR  CCI < -{c.cci_threshold}"),
+            3: (f"ADX >= {c.adx_threshold}  AND  EMA9 > EMA21",
+                f"ADX >= {c.adx_threshold}  AND  EMA9 < EMA21"),
+            4: (f"BB Width > BB Width SMA × {c.bb_width_expansion_factor}  AND  Middle < Close < Upper",
+                f"BB Width > BB Width SMA × {c.bb_width_expansion_factor}  AND  Lower < Close < Middle"),
+            5: (f"Volume > Volume SMA × {c.volume_participation_factor}  AND  OBV rising  AND  EMA9 > EMA21",
+                f"Volume > Volume SMA × {c.volume_participation_factor}  AND  OBV falling  AND  EMA9 < EMA21"),
+            6: (f"Z-Score > {c.z_score_extreme_threshold}",
+                f"Z-Score < -{c.z_score_extreme_threshold}"),
+        }
+        for n, sides in c.rules.items():
+            if n in text:
+                text[n] = (sides.get('long', text[n][0]), sides.get('short', text[n][1]))
+        return text
 
-        if expanding and above_mid:
-            result, direction, reason = 'TRADE', 'LONG',  'Volatility Expanding (Bullish)'
-        elif expanding and below_mid:
-            result, direction, reason = 'TRADE', 'SHORT', 'Volatility Expanding (Bearish)'
-        else:
-            result, direction, reason = 'NO TRADE', 'NONE', 'Volatility not expanding'
+    def make_decisions(self, frame) -> Dict[str, np.ndarray]:
+        """
+        Vectorized make_decision for every candle of an indicator frame
+        (DataFrame, IndicatorFrame or CompactSession). prev() in a rule
+        reads the previous row, as app._run_decision does for OBV.
+
+        Returns per-candle arrays:
+            signal  — int8, 1 LONG / -1 SHORT / 0 NONE
+            outcome — int8 code, see OUTCOME_REASONS
+            fired   — uint8 bitmask, bit n - 1 set when layer n fired
+            states  — int8 (candles × enabled layers), see LAYER_OUTCOMES
+        """
+        n = len(frame)
+
+        base   = gather(frame, ('ema_9', 'ema_21', 'adx', 'atr'))
+        valid  = ~np.isnan(np.column_stack(list(base.values()))).any(axis=1)
+        states = self.layer_states(gather(frame, self.rule_columns()))
+
+        any_long  = np.zeros(n, dtype=bool)
+        any_short = np.zeros(n, dtype=bool)
+        fired     = np.zeros(n, dtype=np.uint8)
+        for layer, state in states.items():
+            any_long  |= state == STATE_LONG
+            any_short |= state == STATE_SHORT
+            fired     |= (((state == STATE_LONG) | (state == STATE_SHORT)) << (layer - 1)).astype(np.uint8)
+
+        trade   = valid & (any_long ^ any_short)
+        outcome = np.select(
+            [~valid, trade, any_long & any_short],
+            [INSUFFICIENT, TRADE, CONFLICT],
+            NO_CONDITIONS,
+        ).astype(np.int8)
 
         return {
-            'layer':     4,
-            'name':      'Volatility Expansion',
-            'result':    result,
-            'direction': direction,
-            'reason':    reason,
-            'indicators': {
-                'BB Width':     f"{ind['bb_width']:.4f}",
-                'BB Width SMA': f"{ind['bb_width_sma']:.4f}",
-                'BB Upper':     f"{ind['bb_upper']:.2f}",
-                'BB Middle':    f"{ind['bb_middle']:.2f}",
-                'BB Lower':     f"{ind['bb_lower']:.2f}",
-                'Close':        f"{ind['close']:.2f}",
-            },
-            'long_condition':  f"BB Width > BB Width SMA × {self.config.bb_width_expansion_factor}  AND  Middle < Close < Upper",
-            'short_condition': f"BB Width > BB Width SMA × {self.config.bb_width_expansion_factor}  AND  Lower < Close < Middle",
+            'signal':  np.where(trade, np.where(any_long, 1, -1), 0).astype(np.int8),
+            'outcome': outcome,
+            'fired':   np.where(valid, fired, 0).astype(np.uint8),
+            'states':  np.column_stack([states[l] for l in self.config.enabled_layers]).astype(np.int8)
+                       if states else np.zeros((n, 0), dtype=np.int8),
         }
 
-    def _layer_volume(self, ind, prev_obv, ema_bull, ema_bear):
-        vol_good = ind['volume'] > ind['volume_sma'] * self.config.volume_participation_factor
-        obv_inc  = prev_obv is not None and ind['obv'] > prev_obv
-
-        if vol_good and prev_obv is not None:
-            if obv_inc and ema_bull:
-                result, direction, reason = 'TRADE', 'LONG',  'Volume Participation Good (Bullish)'
-            elif not obv_inc and ema_bear:
-                result, direction, reason = 'TRADE', 'SHORT', 'Volume Participation Good (Bearish)'
-            else:
-                result, direction, reason = 'NO TRADE', 'NONE', 'Volume direction conflicts with trend'
-        else:
-            result, direction, reason = 'NO TRADE', 'NONE', 'Volume not sufficient'
+    def layer_states(self, columns: Dict[str, np.ndarray]) -> Dict[int, np.ndarray]:
+        """
+        State code per candle for each enabled layer — the one place layer
+        conditions are evaluated. columns maps every rule column to a
+        float64 array (rules.gather).
+        """
+        n      = len(next(iter(columns.values()))) if columns else 1
+        states = {}
+        for layer in self.config.enabled_layers:
+            rules = self.rules[layer]
 
-        obv_prev_str = f"{prev_obv:,.0f}" if prev_obv is not None else 'N/A'
-        return {
-            'layer':     5,
-            'name':      'Volume Participation',
-            'result':    result,
-            'direction': direction,
-            'reason':    reason,
-            'indicators': {
-                'Volume':     f"{ind['volume']:,.0f}",
-                'Volume SMA': f"{ind['volume_sma']:,.0f}",
-                'OBV':        f"{ind['obv']:,.0f}",
-                'Prev OBV':   obv_prev_str,
-            },
-            'long_condition':  f"Volume > Volume SMA × {self.config.volume_participation_factor}  AND  OBV rising  AND  EMA9 > EMA21",
-            'short_condition': f"Volume > Volume SMA × {self.config.volume_participation_factor}  AND  OBV falling  AND  EMA9 < EMA21",
-        }
+            def run(side):
+                return np.broadcast_to(np.asarray(rules[side](columns, self._params[layer][side]), dtype=bool), (n,))
 
-    def _layer_statistical(self, ind):
-        z = ind['z_score']
-        if z > self.config.z_score_extreme_threshold:
-            result, direction, reason = 'TRADE', 'LONG',  'Statistical Edge Extreme (Bullish)'
-        elif z < -self.config.z_score_extreme_threshold:
-            result, direction, reason = 'TRADE', 'SHORT', 'Statistical Edge Extreme (Bearish)'
-        else:
-            result, direction, reason = 'NO TRADE', 'NONE', 'No statistical extreme'
+            # LONG is tested first, like an if / elif
+            state = np.where(run('long'), STATE_LONG, np.where(run('short'), STATE_SHORT, STATE_NONE))
+            if 'alt' in rules:
+                state = np.where(run('alt') & (state == STATE_NONE), STATE_NONE_ALT, state)
+            states[layer] = state.astype(np.int8)
+        return states
+
+    # ------------------------------------------------------------------ #
+    # LAYER CARDS
+    # ------------------------------------------------------------------ #
 
+    def _layer_card(self, layer: int, ind: Dict, state: int, conditions: tuple) -> Dict:
+        result, direction, reason = LAYER_OUTCOMES[layer][state]
         return {
-            'layer':     6,
-            'name':      'Statistical Edge',
+            'layer':     layer,
+            'name':      LAYER_NAMES[layer],
             'result':    result,
             'direction': direction,
             'reason':    reason,
             'indicators': {
-                'Z-Score':   f"{z:.4f}",
-                'ATR':       f"{ind['atr']:.4f}",
+                label: _display(ind[key], spec) for label, (key, spec) in LAYER_DISPLAY[layer].items()
             },
-            'long_condition':  f"Z-Score > {self.config.z_score_extreme_threshold}",
-            'short_condition': f"Z-Score < -{self.config.z_score_extreme_threshold}",
+            'long_condition':  conditions[0],
+            'short_condition': conditions[1],
         }
 
     # ------------------------------------------------------------------ #
     # HELPERS
     # ------------------------------------------------------------------ #
 
-    def _extract(self, candle: pd.Series) -> Dict:
-        return {
-            'ema_9':        candle['ema_9'],
-            'ema_21':       candle['ema_21'],
-            'macd':         candle['macd'],
-            'macd_signal':  candle['macd_signal'],
-            'close':        candle['close'],
-            'vwap':         candle['vwap'],
-            'rsi':          candle['rsx'],
-            'roc':          candle['roc'],
-            'cci':          candle['cci'],
-            'adx':          candle['adx'],
-            'bb_width':     candle['bb_width'],
-            'bb_width_sma': candle['bb_width_sma'],
-            'bb_upper':     candle['bb_upper'],
-            'bb_middle':    candle['bb_middle'],
-            'bb_lower':     candle['bb_lower'],
-            'volume':       candle['volume'],
-            'volume_sma':   candle['volume_sma'],
-            'z_score':      candle['z_score'],
-            'atr':          candle['atr'],
-            'obv':          candle['obv'],
-        }
+    def _extract(self, candle) -> Dict:
+        # candle is a Series or a plain {column: value} dict. Columns of
+        # disabled layers may not exist — those read as NaN
+        def get(key):
+            return candle[key] if key in candle else np.nan
+
+        return {key: get(col) for key, col in _EXTRACT_COLUMNS.items()}
+
+    def states_at(self, frame, idx: int) -> Dict[int, int]:
+        """
+        layer_states at one candle of a frame (DataFrame, IndicatorFrame or
+        CompactSession), reading only the rows the rules' prev() reach back
+        to — the same evaluation make_decisions runs over every candle.
+        """
+        lookback = max((rule.lookback for sides in self.rules.values() for rule in sides.values()), default=0)
+        columns  = gather(frame, self.rule_columns(), slice(max(0, idx - lookback), idx + 1))
+        return {n: int(s[-1]) for n, s in self.layer_states(columns).items()}
+
+    def _states_at(self, candle, prev_obv: Optional[float]) -> Dict[int, int]:
+        """
+        layer_states for a lone candle. The only history known here is the
+        previous OBV, so prev() of any other column reads NaN — callers with
+        the frame use states_at.
+        """
+        columns = {}
+        for col in self.rule_columns():
+            value = candle[col] if col in candle else np.nan
+            prev  = prev_obv if col == 'obv' and prev_obv is not None else np.nan
+            columns[col] = np.array([prev, value], dtype=np.float64)
+        states = self.layer_states(columns)
+        return {n: int(s[-1]) for n, s in states.items()}
 
     def _validate(self, ind: Dict) -> bool:
         for key in ['ema_9', 'ema_21', 'adx', 'atr']:
@@ -274,4 +429,13 @@ class DecisionEngine:
             result['close'] = indicators['close']
             result['atr']   = indicators['atr']
             result['z_score'] = indicators['z_score']
-        return result
\ No newline at end of file
+        return result
+
+
+def _display(value, spec: str) -> str:
+    # prev_obv is None on the first candle
+    return 'N/A' if value is None else format(value, spec)
+
+
+def _raw(value) -> Optional[float]:
+    return None if value is None or pd.isna(value) else float(value)
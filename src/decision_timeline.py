@@ -0,0 +1,135 @@
+"""
+Precomputed decision timeline for SYNAPSE web app.
+/api/chart evaluates the decision and risk levels for every candle once;
+/api/decision then only looks the answer up and formats it.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from .decision_engine import DecisionEngine, OUTCOME_REASONS
+from .logger import get_logger
+from .risk_manager import RiskManager
+
+logger = get_logger()
+
+
+def candle_at(session, idx: int) -> tuple[Dict[str, float], Optional[float]]:
+    """One row of a session as a plain dict, and the previous candle's OBV."""
+    candle   = {name: float(session[name][idx]) for name in session.column_names}
+    prev_obv = float(session['obv'][idx - 1]) if idx > 0 and 'obv' in session else None
+    return candle, prev_obv
+
+
+class DecisionTimeline:
+    """
+    Per-candle decision arrays kept alongside a cached session:
+    int8 signal / outcome, uint8 fired mask, int8 layer states (candles ×
+    enabled layers) and float64 stop / target distances (NaN without a
+    trade), plus the sorted indices of every signal past warmup for
+    next / previous navigation.
+    """
+
+    def __init__(self, config, signal: np.ndarray, states: np.ndarray,
+                 sl_distance: np.ndarray, tp_distance: np.ndarray,
+                 outcome: np.ndarray, fired: np.ndarray):
+        self.config      = config
+        self.signal      = signal
+        self.states      = states
+        self.outcome     = outcome
+        self.fired       = fired
+        self.sl_distance = sl_distance
+        self.tp_distance = tp_distance
+        self.layers      = list(config.enabled_layers)
+        self.signals     = np.flatnonzero(signal)
+        self.signals     = self.signals[self.signals >= config.min_warmup_candles]
+        self._engine     = DecisionEngine(config)
+        self._risk       = RiskManager(config)
+
+    @classmethod
+    def build(cls, session, config) -> 'DecisionTimeline':
+        """Vectorized decisions + risk distances for every candle of a session."""
+        decisions = DecisionEngine(config).make_decisions(session)
+        sl, tp    = RiskManager(config).risk_distances(
+            decisions['signal'],
+            np.asarray(session['atr'], dtype=np.float64),
+            np.asarray(session['z_score'], dtype=np.float64),
+        )
+        timeline = cls(config, decisions['signal'], decisions['states'], sl, tp,
+                       decisions['outcome'], decisions['fired'])
+        logger.info(f"Decision timeline built — {len(timeline.signals)} signals "
+                    f"over {len(session)} candles")
+        return timeline
+
+    def decision(self, session, idx: int) -> Dict:
+        """The _run_decision result at idx, from the stored arrays — formatting only."""
+        candle, prev_obv = candle_at(session, idx)
+        states   = dict(zip(self.layers, self.states[idx].tolist()))
+        decision = self._engine.describe(candle, prev_obv, states)
+
+        if decision['decision'] == 'TRADE':
+            self._risk.apply_distances(decision, float(self.sl_distance[idx]), float(self.tp_distance[idx]))
+        return decision
+
+    def raw_decision(self, session, idx: int) -> Dict:
+        """Compact counterpart of decision() — DecisionEngine.raw_decision plus raw risk levels."""
+        candle, prev_obv = candle_at(session, idx)
+        states   = dict(zip(self.layers, self.states[idx].tolist()))
+        decision = self._engine.raw_decision(candle, prev_obv, states)
+
+        if decision['signal'] != 0:
+            decision['risk'] = self._risk.risk_levels(
+                candle['close'], decision['signal'],
+                float(self.sl_distance[idx]), float(self.tp_distance[idx])
+            )
+        return decision
+
+    def columns(self, session, idx: np.ndarray) -> Dict:
+        """
+        Decisions at many candle indices as columns (one list per field,
+        None for NaN) — fancy indexing into the stored arrays, no per-row work.
+        Codes read as in raw_decision; risk fields are None without a trade.
+        """
+        close  = np.asarray(session['close'], dtype=np.float64)[idx]
+        signal = self.signal[idx]
+        levels = self._risk.risk_level_columns(close, signal, self.sl_distance[idx], self.tp_distance[idx])
+
+        out = {
+            'decision_idx':       idx.tolist(),
+            'decision_timestamp': session.timestamp_strings(idx),
+            'signal':             signal.tolist(),
+            'outcome':            self.outcome[idx].tolist(),
+            'fired':              self.fired[idx].tolist(),
+            'states':             self.states[idx].tolist(),
+            'layers':             self.layers,
+            'outcome_reasons':    list(OUTCOME_REASONS),
+        }
+        for name in ('close', 'atr', 'z_score'):
+            out[name] = _column(np.asarray(session[name], dtype=np.float64)[idx])
+        for name, values in levels.items():
+            out[name] = _column(values)
+        return out
+
+    def templates(self) -> Dict:
+        return self._engine.templates()
+
+    def neighbors(self, idx: int) -> tuple[Optional[int], Optional[int]]:
+        """Indices of the closest signals before and after idx (None at either end)."""
+        pos  = np.searchsorted(self.signals, idx)
+        prev = int(self.signals[pos - 1]) if pos > 0 else None
+        if pos < len(self.signals) and self.signals[pos] == idx:
+            pos += 1
+        nxt  = int(self.signals[pos]) if pos < len(self.signals) else None
+        return prev, nxt
+
+    @property
+    def nbytes(self) -> int:
+        return (self.signal.nbytes + self.states.nbytes + self.sl_distance.nbytes
+                + self.tp_distance.nbytes + self.signals.nbytes
+                + self.outcome.nbytes + self.fired.nbytes)
+
+
+def _column(values: np.ndarray) -> list:
+    # JSON has no NaN — missing values go out as null
+    return np.where(np.isnan(values), None, values).tolist()
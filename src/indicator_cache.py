@@ -0,0 +1,129 @@
+"""
+Content-addressed memoization for indicator results.
+Entries are keyed by a hash of the OHLCV input plus the indicator node and
+its parameters, so the same bars give a cache hit whichever session asks.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# Prefix lookups are indexed by a hash of the first ANCHOR_BARS bars
+ANCHOR_BARS = 64
+
+
+def _digest(columns: list, m: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for col in columns:
+        h.update(memoryview(np.ascontiguousarray(col[:m], dtype=np.float64)))
+    return h.hexdigest()
+
+
+class InputFingerprint:
+    """Hashes of one OHLCV input — full, anchor, and any prefix on demand."""
+
+    def __init__(self, data: Dict[str, np.ndarray]):
+        # Column prefixes are hashed in place — no stacked copy of the bars
+        self.columns = [data[k] for k in ('open', 'high', 'low', 'close', 'volume')]
+        self.n       = len(self.columns[0])
+        self.digest  = _digest(self.columns, self.n)
+        self.anchor  = _digest(self.columns, ANCHOR_BARS)
+
+    def prefix_digest(self, m: int) -> str:
+        return self.digest if m == self.n else _digest(self.columns, m)
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU of indicator outputs under a byte budget.
+
+    get() returns an exact hit, or else the longest cached run whose input
+    is a prefix of the current one, so the caller only computes the suffix.
+    Cached arrays are read-only.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes    = 0
+        self._entries  = OrderedDict()   # (digest, node, params) -> (values, n, anchor)
+        self._prefixes = {}              # (anchor, node, params) -> {n: digest}
+        self._lock     = threading.Lock()
+        self.hits      = 0
+        self.partial   = 0
+        self.misses    = 0
+
+    def get(self, fp: InputFingerprint, node: str, params: tuple) -> tuple[Optional[dict], int]:
+        """(values, length) of the best entry, or (None, 0)."""
+        with self._lock:
+            key   = (fp.digest, node, params)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], fp.n
+
+            lengths = sorted(
+                (m for m in self._prefixes.get((fp.anchor, node, params), {}) if m < fp.n),
+                reverse=True
+            )
+            candidates = [(m, self._prefixes[(fp.anchor, node, params)][m]) for m in lengths]
+
+        # Hash prefixes outside the lock — longest verified prefix wins
+        for m, digest in candidates:
+            if fp.prefix_digest(m) != digest:
+                continue
+            with self._lock:
+                entry = self._entries.get((digest, node, params))
+                if entry is None:
+                    continue
+                self._entries.move_to_end((digest, node, params))
+                self.partial += 1
+                return entry[0], m
+
+        with self._lock:
+            self.misses += 1
+        return None, 0
+
+    def put(self, fp: InputFingerprint, node: str, params: tuple, values: dict) -> None:
+        frozen = {}
+        for col, arr in values.items():
+            arr = np.array(arr, dtype=np.float64)
+            arr.setflags(write=False)
+            frozen[col] = arr
+        size = sum(a.nbytes for a in frozen.values())
+        if size > self.max_bytes:
+            return
+
+        key = (fp.digest, node, params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+
+            self._entries[key] = (frozen, fp.n, fp.anchor)
+            self.nbytes += size
+            if fp.n >= ANCHOR_BARS:
+                self._prefixes.setdefault((fp.anchor, node, params), {})[fp.n] = fp.digest
+
+            while self.nbytes > self.max_bytes:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        (digest, node, params), (values, n, anchor) = self._entries.popitem(last=False)
+        self.nbytes -= sum(a.nbytes for a in values.values())
+
+        lengths = self._prefixes.get((anchor, node, params))
+        if lengths is not None and lengths.get(n) == digest:
+            del lengths[n]
+            if not lengths:
+                del self._prefixes[(anchor, node, params)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,78 @@
+"""
+Columnar indicator frame for SYNAPSE web app.
+One preallocated float64 buffer holds the bars and every indicator, so the
+request path fills it in place instead of copying DataFrames around.
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+BAR_INPUTS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class IndicatorFrame:
+    """
+    (columns × candles) float64 buffer with named row views.
+
+    frame['ema_9'] is a contiguous view into the buffer (what TA-Lib wants
+    as input); frame['ema_9'] = values copies into that row. Reading code
+    only needs .index, .columns, `in`, len() and [] — the same subset of
+    the DataFrame API, so build_chart and CompactSession take either.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, names: Iterable[str]):
+        names        = list(dict.fromkeys(names))
+        self.index   = index
+        self.buffer  = np.full((len(names), len(index)), np.nan)
+        self._rows   = {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def from_bars(cls, df: pd.DataFrame, names: Iterable[str] = ()) -> 'IndicatorFrame':
+        """Copy OHLCV in once and reserve NaN rows for `names`."""
+        frame = cls(df.index, BAR_INPUTS + tuple(names))
+        for col in BAR_INPUTS:
+            frame[col] = df[col].to_numpy()
+        return frame
+
+    @classmethod
+    def wrap(cls, index: pd.DatetimeIndex, names: Iterable[str], buffer: np.ndarray) -> 'IndicatorFrame':
+        """Frame over an existing (columns × candles) buffer, e.g. shared memory — no copy."""
+        frame        = cls.__new__(cls)
+        frame.index  = index
+        frame.buffer = buffer
+        frame._rows  = {name: i for i, name in enumerate(names)}
+        return frame
+
+    def slice(self, start: int, stop: int) -> 'IndicatorFrame':
+        """Candles [start, stop) as a view — indicators keep the warmup of the full history."""
+        return IndicatorFrame.wrap(self.index[start:stop], self.columns, self.buffer[:, start:stop])
+
+    @property
+    def columns(self) -> list:
+        return list(self._rows)
+
+    def __len__(self) -> int:
+        return self.buffer.shape[1]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.buffer[self._rows[name]]
+
+    def __setitem__(self, name: str, values) -> None:
+        if name not in self._rows:
+            # Not reserved up front — grow the buffer (one copy)
+            self._rows[name] = len(self.buffer)
+            self.buffer = np.vstack([self.buffer, np.full((1, len(self)), np.nan)])
+        self.buffer[self._rows[name]] = values
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame over the same buffer (transposed view, no copy)."""
+        return pd.DataFrame(self.buffer.T, index=self.index, columns=self.columns, copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes
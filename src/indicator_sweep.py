@@ -0,0 +1,309 @@
+"""
+Parameter-grid indicator sweeps for SYNAPSE web app.
+Computes an indicator for many periods at once over the same bars and
+returns one (candles × parameter sets) array per output column.
+"""
+
+from functools import cached_property
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+import talib
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# Grid keys accepted by IndicatorSweep.run
+SWEEP_INDICATORS = ('ema', 'macd', 'rsx', 'roc', 'cci', 'adx', 'bb', 'atr', 'volume_sma', 'z_score')
+
+
+def _rolling_sum(prefix: np.ndarray, periods: np.ndarray, first_valid=None) -> np.ndarray:
+    """
+    Window sums for every period from one prefix-sum array.
+    prefix is (n + 1,) or (n + 1, P) with a leading zero row. Windows that
+    start before `first_valid` (default 0) are NaN.
+    """
+    n     = len(prefix) - 1
+    end   = np.arange(1, n + 1)[:, None]
+    start = end - periods[None, :]
+    lo    = np.zeros_like(periods) if first_valid is None else first_valid
+
+    safe = np.maximum(start, 0)
+    if prefix.ndim == 1:
+        out = prefix[end] - prefix[safe]
+    else:
+        cols = np.arange(prefix.shape[1])[None, :]
+        out  = prefix[end, cols] - prefix[safe, cols]
+
+    out[start < lo[None, :]] = np.nan
+    return out
+
+
+def _rolling_moments(x: np.ndarray, periods: np.ndarray) -> tuple:
+    """
+    Rolling mean and population variance of x for every period.
+
+    One prefix sum of x² over the whole series carries ~|Σx²|·eps of error
+    into every window, which swamps the variance of a long, drifting series.
+    Here each block of `block` candles gets its own prefix sums over the
+    previous and current block, centred on the block's first value, so a
+    window's error only scales with the prices around it.
+    """
+    n     = len(x)
+    block = max(64, int(periods.max()))
+    nb    = -(-n // block)
+
+    # Row k covers x[(k - 1) * block:(k + 1) * block] — every window ending in block k
+    padded = np.concatenate([np.zeros(block), x, np.zeros(nb * block - n)])
+    anchor = x[np.minimum(np.arange(nb) * block, n - 1)]
+    rows   = np.lib.stride_tricks.sliding_window_view(padded, 2 * block)[::block][:nb] - anchor[:, None]
+
+    s1 = np.zeros((nb, 2 * block + 1))
+    s2 = np.zeros((nb, 2 * block + 1))
+    np.cumsum(rows, axis=1, out=s1[:, 1:])
+    np.cumsum(rows * rows, axis=1, out=s2[:, 1:])
+
+    end = np.arange(1, n + 1)
+    k   = ((end - 1) // block)[:, None]
+    hi  = (end[:, None] - (k - 1) * block)
+    lo  = hi - periods[None, :]
+
+    mean = (s1[k, hi] - s1[k, lo]) / periods
+    var  = (s2[k, hi] - s2[k, lo]) / periods - mean * mean
+    mean += anchor[k]
+
+    short = end[:, None] < periods[None, :]
+    mean[short] = np.nan
+    var[short]  = np.nan
+    return mean, var
+
+
+def ema_from(values: np.ndarray, seed: float, start: int, period: int) -> np.ndarray:
+    """
+    EMA (k = 2 / (period + 1)) that takes `seed` at index `start` and recurses
+    over values[start + 1:]. Runs in TA-Lib by padding the seed period times,
+    so TA-Lib's own SMA seed evaluates to exactly `seed`.
+    """
+    out = np.full(len(values), np.nan)
+    if start >= len(values):
+        return out
+    if period == 1:
+        out[start]      = seed
+        out[start + 1:] = values[start + 1:]
+        return out
+
+    padded = np.concatenate([np.full(period, seed), values[start + 1:]])
+    out[start:] = talib.EMA(padded, timeperiod=period)[period - 1:]
+    return out
+
+
+def wilder(values: np.ndarray, seed: float, start: int, period: int) -> np.ndarray:
+    """Wilder smoothing (alpha = 1 / period) — an EMA with period 2p - 1."""
+    return ema_from(values, seed, start, 2 * period - 1)
+
+
+class IndicatorSweep:
+    """
+    Shares intermediates across a grid: prefix sums of volume, true range, gains/losses, directional movement and typical price
+    are computed once and reused by every period that needs them.
+
+    Window indicators (SMA, STDDEV, Bollinger, z-score, ROC) are evaluated for
+    all periods in one broadcast. Recursive ones (EMA, RSI, ATR, ADX, MACD)
+    run per period in TA-Lib's C loop on the shared inputs.
+
+    Grid keys are SWEEP_INDICATORS; macd takes (fast, slow, signal) tuples,
+    the rest take periods. Non-swept settings (bb_std) come from config.
+    """
+
+    def __init__(self, df: pd.DataFrame, config):
+        self.config = config
+        self.index  = df.index
+        self.high   = df['high'].to_numpy(dtype=np.float64)
+        self.low    = df['low'].to_numpy(dtype=np.float64)
+        self.close  = df['close'].to_numpy(dtype=np.float64)
+        self.volume = df['volume'].to_numpy(dtype=np.float64)
+        self.n      = len(df)
+
+    def run(self, grid: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+        """Evaluate every indicator in the grid. Column j of each array is grid[key][j]."""
+        out = {}
+        for key, params in grid.items():
+            if key not in SWEEP_INDICATORS:
+                raise KeyError(f'Unknown sweep indicator: {key}')
+            result = getattr(self, key)(list(params))
+            out.update(result if isinstance(result, dict) else {key: result})
+
+        logger.info(f"Indicator sweep — {self.n} candles, "
+                    f"{sum(len(p) for p in grid.values())} parameter sets")
+        return out
+
+    # ------------------------------------------------------------------ #
+    # SHARED INTERMEDIATES
+    # ------------------------------------------------------------------ #
+
+    @cached_property
+    def _volume_prefix(self) -> np.ndarray:
+        return np.r_[0.0, np.cumsum(self.volume)]
+
+    @cached_property
+    def _true_range(self) -> np.ndarray:
+        tr = np.full(self.n, np.nan)
+        prev_close = self.close[:-1]
+        tr[1:] = np.maximum.reduce([
+            self.high[1:] - self.low[1:],
+            np.abs(self.high[1:] - prev_close),
+            np.abs(self.low[1:] - prev_close),
+        ])
+        return tr
+
+    @cached_property
+    def _gain_loss(self) -> tuple:
+        diff = np.r_[np.nan, np.diff(self.close)]
+        return np.where(diff > 0, diff, 0.0), np.where(diff < 0, -diff, 0.0)
+
+    @cached_property
+    def _directional_movement(self) -> tuple:
+        diff_p = np.r_[np.nan, np.diff(self.high)]
+        diff_m = np.r_[np.nan, -np.diff(self.low)]
+        plus   = np.where((diff_p > 0) & (diff_p > diff_m), diff_p, 0.0)
+        minus  = np.where((diff_m > 0) & (diff_p < diff_m), diff_m, 0.0)
+        return plus, minus
+
+    @cached_property
+    def _typical_price(self) -> np.ndarray:
+        return (self.high + self.low + self.close) / 3.0
+
+    def _sma_std(self, periods: np.ndarray) -> tuple:
+        """Close SMA and population std (TA-Lib STDDEV) for all periods."""
+        mean, var = _rolling_moments(self.close, periods)
+        with np.errstate(invalid='ignore'):
+            std = np.where(var >= 1e-8, np.sqrt(np.maximum(var, 0)), 0.0)
+        std[np.isnan(var)] = np.nan
+        return mean, std
+
+    # ------------------------------------------------------------------ #
+    # INDICATORS — each returns (n, P) or {column: (n, P)}
+    # ------------------------------------------------------------------ #
+
+    def ema(self, periods: list) -> np.ndarray:
+        return np.column_stack([talib.EMA(self.close, timeperiod=p) for p in periods])
+
+    def macd(self, params: list) -> Dict[str, np.ndarray]:
+        """TA-Lib MACD for (fast, slow, signal) tuples; slow EMAs are shared."""
+        slow_emas = {s: talib.EMA(self.close, timeperiod=s) for _, s, _ in params}
+        macd, signal = [], []
+
+        for fast, slow, sig in params:
+            # TA-Lib starts the fast line at slow - 1, seeded from the last `fast` closes
+            fast_ema = ema_from(self.close, self.close[slow - fast:slow].mean(), slow - 1, fast)
+            line     = fast_ema - slow_emas[slow]
+            sig_line = talib.EMA(line, timeperiod=sig)
+            line     = np.where(np.isnan(sig_line), np.nan, line)
+            macd.append(line)
+            signal.append(sig_line)
+
+        macd, signal = np.column_stack(macd), np.column_stack(signal)
+        return {'macd': macd, 'macd_signal': signal, 'macd_hist': macd - signal}
+
+    def rsx(self, periods: list) -> np.ndarray:
+        """Wilder RSI (the rsx column) on shared gains/losses."""
+        gain, loss = self._gain_loss
+        cols = []
+        for p in periods:
+            avg_gain = wilder(gain, gain[1:p + 1].mean(), p, p)
+            avg_loss = wilder(loss, loss[1:p + 1].mean(), p, p)
+            total    = avg_gain + avg_loss
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rsi = np.where(np.abs(total) < 1e-8, 0.0, 100.0 * avg_gain / total)
+            rsi[np.isnan(total)] = np.nan
+            cols.append(rsi)
+        return np.column_stack(cols)
+
+    def roc(self, periods: list) -> np.ndarray:
+        p    = np.asarray(periods)
+        idx  = np.arange(self.n)[:, None] - p[None, :]
+        base = self.close[np.maximum(idx, 0)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = np.where(base != 0, (self.close[:, None] / base - 1.0) * 100.0, 0.0)
+        out[idx < 0] = np.nan
+        return out
+
+    def cci(self, periods: list) -> np.ndarray:
+        """Mean deviation isn't a prefix-sum quantity — windows are strided views of the shared typical price."""
+        tp   = self._typical_price
+        cols = []
+        for p in periods:
+            col = np.full(self.n, np.nan)
+            if self.n >= p:
+                windows  = np.lib.stride_tricks.sliding_window_view(tp, p)
+                avg      = windows.mean(axis=1)
+                mean_dev = np.abs(windows - avg[:, None]).mean(axis=1)
+                diff     = tp[p - 1:] - avg
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    col[p - 1:] = np.where((diff != 0) & (mean_dev != 0),
+                                           diff / (0.015 * mean_dev), 0.0)
+            cols.append(col)
+        return np.column_stack(cols)
+
+    def atr(self, periods: list) -> np.ndarray:
+        tr = self._true_range
+        return np.column_stack([wilder(tr, tr[1:p + 1].mean(), p, p) for p in periods])
+
+    def adx(self, periods: list) -> np.ndarray:
+        """
+        TA-Lib ADX on shared TR / DM. Differs from TA-Lib only where the true
+        range is flat for a whole window (TA-Lib skips that bar, we count DX as 0).
+        """
+        tr = self._true_range
+        plus, minus = self._directional_movement
+        cols = []
+        for p in periods:
+            # Smoothed sums / p — DI is a ratio, so the 1/p cancels
+            sm_tr    = wilder(tr,    tr[1:p].sum() / p,    p - 1, p)
+            sm_plus  = wilder(plus,  plus[1:p].sum() / p,  p - 1, p)
+            sm_minus = wilder(minus, minus[1:p].sum() / p, p - 1, p)
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                plus_di  = 100.0 * sm_plus / sm_tr
+                minus_di = 100.0 * sm_minus / sm_tr
+                di_sum   = plus_di + minus_di
+                dx = np.where(np.abs(di_sum) < 1e-8, 0.0, 100.0 * np.abs(minus_di - plus_di) / di_sum)
+            dx[np.abs(sm_tr * p) < 1e-8] = 0.0
+
+            seed_at = 2 * p - 1
+            col = wilder(dx, dx[p:seed_at + 1].mean(), seed_at, p) if self.n > seed_at \
+                else np.full(self.n, np.nan)
+            cols.append(col)
+        return np.column_stack(cols)
+
+    def bb(self, periods: list) -> Dict[str, np.ndarray]:
+        """Bollinger Bands + width + width SMA (same period, like IndicatorCalculator)."""
+        p = np.asarray(periods)
+        middle, std = self._sma_std(p)
+        dev   = std * self.config.bb_std
+        upper = middle + dev
+        lower = middle - dev
+        width = upper - lower
+
+        # SMA of the width — each column has its own NaN warmup of p - 1
+        width_prefix = np.vstack([np.zeros(len(p)), np.cumsum(np.nan_to_num(width), axis=0)])
+        width_sma    = _rolling_sum(width_prefix, p, first_valid=p - 1) / p
+
+        return {
+            'bb_upper':     upper,
+            'bb_middle':    middle,
+            'bb_lower':     lower,
+            'bb_width':     width,
+            'bb_width_sma': width_sma,
+        }
+
+    def volume_sma(self, periods: list) -> np.ndarray:
+        p = np.asarray(periods)
+        return _rolling_sum(self._volume_prefix, p) / p
+
+    def z_score(self, periods: list) -> np.ndarray:
+        sma, std = self._sma_std(np.asarray(periods))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(std != 0, (self.close[:, None] - sma) / std, 0.0)
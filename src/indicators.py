@@ -6,76 +6,265 @@ import numpy as np
 import pandas as pd
 import talib
 
+from .indicator_cache import IndicatorCache, InputFingerprint
+from .indicator_frame import BAR_INPUTS, IndicatorFrame
+from .indicator_sweep import ema_from, wilder
 from .logger import get_logger
 
 logger = get_logger()
 
+# Columns that exist before indicators run (bars) or are added afterwards
+# (vwap, by src.vwap). Asking for them is allowed and costs nothing here.
+EXTERNAL_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'vwap')
+
+# Indicator dependency graph — node: (columns it produces, nodes it needs).
+# Bar inputs are always available and not listed.
+INDICATOR_GRAPH = {
+    'ema_9':        (('ema_9',),                            ()),
+    'ema_21':       (('ema_21',),                           ()),
+    'macd':         (('macd', 'macd_signal', 'macd_hist'),  ()),
+    'rsx':          (('rsx',),                              ()),
+    'roc':          (('roc',),                              ()),
+    'cci':          (('cci',),                              ()),
+    'adx':          (('adx',),                              ()),
+    'bbands':       (('bb_upper', 'bb_middle', 'bb_lower'), ()),
+    'bb_width':     (('bb_width',),                         ('bbands',)),
+    'bb_width_sma': (('bb_width_sma',),                     ('bb_width',)),
+    'atr':          (('atr',),                              ()),
+    'volume_sma':   (('volume_sma',),                       ()),
+    'obv':          (('obv',),                              ()),
+    'z_score':      (('z_score',),                          ()),
+}
+
+# Output column -> node that produces it
+COLUMN_NODES = {col: node for node, (cols, _) in INDICATOR_GRAPH.items() for col in cols}
+
+# Config fields each node reads — part of its memoization key
+NODE_PARAMS = {
+    'ema_9':        ('ema_fast_period',),
+    'ema_21':       ('ema_slow_period',),
+    'macd':         ('macd_fast', 'macd_slow', 'macd_signal'),
+    'rsx':          ('rsi_period',),
+    'roc':          ('roc_period',),
+    'cci':          ('cci_period',),
+    'adx':          ('adx_period',),
+    'bbands':       ('bb_period', 'bb_std'),
+    'bb_width':     ('bb_period', 'bb_std'),
+    'bb_width_sma': ('bb_period', 'bb_std'),
+    'atr':          ('atr_period',),
+    'volume_sma':   ('volume_sma_period',),
+    'obv':          (),
+    'z_score':      ('z_score_period',),
+}
+
+# Finite-window nodes: bars of history a value depends on. A cached prefix is
+# extended by recomputing only the new bars plus this much history.
+NODE_WINDOW = {
+    'roc':          lambda c: c.roc_period,
+    'cci':          lambda c: c.cci_period - 1,
+    'bbands':       lambda c: c.bb_period - 1,
+    'bb_width':     lambda c: 0,
+    'bb_width_sma': lambda c: c.bb_period - 1,
+    'volume_sma':   lambda c: c.volume_sma_period - 1,
+    'z_score':      lambda c: c.z_score_period - 1,
+}
+
 
 class IndicatorCalculator:
 
-    def __init__(self, config):
+    def __init__(self, config, cache: IndicatorCache = None):
         self.config = config
+        self.cache  = cache
 
-    def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate all indicators needed for the decision tree."""
-        df = df.copy()
-        c = self.config
+    def calculate(self, df: pd.DataFrame, columns=None) -> pd.DataFrame:
+        """
+        Calculate indicators needed for the decision tree.
+        With `columns`, only those (and what they depend on) are computed.
+        DataFrame wrapper around compute() — the bars plus one column each.
+        """
+        frame = self.compute(df, columns)
+        added = frame.to_frame()[[c for c in frame.columns if c in COLUMN_NODES]]
+        return pd.concat([df.drop(columns=df.columns.intersection(added.columns)), added], axis=1)
+
+    def compute(self, df: pd.DataFrame, columns=None) -> IndicatorFrame:
+        """
+        Calculate indicators into one preallocated IndicatorFrame.
+        Rows are reserved for every output up front (plus any requested
+        external column such as vwap), so nothing is copied or reallocated.
+        With a cache, results are reused for identical (or prefix) inputs.
+        """
+        nodes    = self.resolve(columns)
+        external = [c for c in (columns or ()) if c in EXTERNAL_COLUMNS and c not in BAR_INPUTS]
+        outputs  = [col for node in nodes for col in INDICATOR_GRAPH[node][0]]
+        frame    = IndicatorFrame.from_bars(df, outputs + external)
+
+        data = {col: frame[col] for col in BAR_INPUTS}
+        fp   = InputFingerprint(data) if self.cache is not None else None
+
+        for node in nodes:
+            for col, values in self._compute(node, data, fp).items():
+                frame[col] = values
+                data[col]  = frame[col]
+
+        logger.info(f"Indicators calculated — {len(frame)} candles")
+        return frame
+
+    @staticmethod
+    def resolve(columns=None) -> list:
+        """Nodes needed for `columns`, dependencies first. None means everything."""
+        if columns is None:
+            wanted = list(INDICATOR_GRAPH)
+        else:
+            wanted = []
+            for col in columns:
+                if col in EXTERNAL_COLUMNS:
+                    continue
+                if col not in COLUMN_NODES:
+                    raise KeyError(f'Unknown indicator column: {col}')
+                wanted.append(COLUMN_NODES[col])
+
+        order = []
+
+        def visit(node):
+            if node in order:
+                return
+            for dep in INDICATOR_GRAPH[node][1]:
+                visit(dep)
+            order.append(node)
+
+        for node in wanted:
+            visit(node)
+        return order
+
+    def _compute(self, node: str, data: dict, fp) -> dict:
+        """One node — from the cache, by extending a cached prefix, or from scratch."""
+        if fp is None:
+            return getattr(self, f'_calc_{node}')(data)
 
-        o = df['open'].values
-        h = df['high'].values
-        l = df['low'].values
-        cl = df['close'].values
-        v = df['volume'].values
+        params = tuple(getattr(self.config, p) for p in NODE_PARAMS[node])
+        cached, m = self.cache.get(fp, node, params)
 
-        # EMAs
-        df['ema_9']  = talib.EMA(cl, timeperiod=c.ema_fast_period)
-        df['ema_21'] = talib.EMA(cl, timeperiod=c.ema_slow_period)
+        if m == fp.n:
+            return cached
 
-        # MACD
-        df['macd'], df['macd_signal'], df['macd_hist'] = talib.MACD(
-            cl,
+        values = None
+        if m:
+            values = self._extend(node, data, cached, m)
+        if values is None:
+            values = getattr(self, f'_calc_{node}')(data)
+
+        self.cache.put(fp, node, params, values)
+        return values
+
+    def _extend(self, node: str, data: dict, cached: dict, m: int):
+        """
+        Values for all bars given exact values for the first m. Returns None
+        for nodes whose hidden state (MACD lines, RSI averages, ADX sums)
+        isn't in the cached output — those are recomputed in full.
+        """
+        c  = self.config
+        cl = data['close']
+
+        if node in NODE_WINDOW:
+            start = max(0, m - NODE_WINDOW[node](c))
+            tail  = getattr(self, f'_calc_{node}')({k: v[start:] for k, v in data.items()})
+            return {col: np.concatenate([cached[col][:m], tail[col][m - start:]])
+                    for col in cached}
+
+        if node in ('ema_9', 'ema_21'):
+            period = c.ema_fast_period if node == 'ema_9' else c.ema_slow_period
+            prev   = cached[node][m - 1]
+            if np.isnan(prev):
+                return None
+            return {node: np.concatenate([cached[node][:m], ema_from(cl, prev, m - 1, period)[m:]])}
+
+        if node == 'atr':
+            prev = cached['atr'][m - 1]
+            if np.isnan(prev):
+                return None
+            h, l = data['high'], data['low']
+            tr = np.full(len(cl), np.nan)
+            tr[m:] = np.maximum.reduce([
+                h[m:] - l[m:], np.abs(h[m:] - cl[m - 1:-1]), np.abs(l[m:] - cl[m - 1:-1])
+            ])
+            return {'atr': np.concatenate([cached['atr'][:m], wilder(tr, prev, m - 1, c.atr_period)[m:]])}
+
+        if node == 'obv':
+            step = np.sign(np.diff(cl[m - 1:])) * data['volume'][m:]
+            return {'obv': np.concatenate([cached['obv'][:m], cached['obv'][m - 1] + np.cumsum(step)])}
+
+        return None
+
+    # ------------------------------------------------------------------ #
+    # GRAPH NODES — each returns {column: values}
+    # ------------------------------------------------------------------ #
+
+    # EMAs
+    def _calc_ema_9(self, d):
+        return {'ema_9': talib.EMA(d['close'], timeperiod=self.config.ema_fast_period)}
+
+    def _calc_ema_21(self, d):
+        return {'ema_21': talib.EMA(d['close'], timeperiod=self.config.ema_slow_period)}
+
+    # MACD
+    def _calc_macd(self, d):
+        c = self.config
+        macd, signal, hist = talib.MACD(
+            d['close'],
             fastperiod=c.macd_fast,
             slowperiod=c.macd_slow,
             signalperiod=c.macd_signal
         )
+        return {'macd': macd, 'macd_signal': signal, 'macd_hist': hist}
 
-        # RSX (TA-Lib doesn't have RSX so we use RSI as proxy)
-        df['rsx'] = talib.RSI(cl, timeperiod=c.rsi_period)
+    # RSX (TA-Lib doesn't have RSX so we use RSI as proxy)
+    def _calc_rsx(self, d):
+        return {'rsx': talib.RSI(d['close'], timeperiod=self.config.rsi_period)}
 
-        # ROC
-        df['roc'] = talib.ROC(cl, timeperiod=c.roc_period)
+    # ROC
+    def _calc_roc(self, d):
+        return {'roc': talib.ROC(d['close'], timeperiod=self.config.roc_period)}
 
-        # CCI
-        df['cci'] = talib.CCI(h, l, cl, timeperiod=c.cci_period)
+    # CCI
+    def _calc_cci(self, d):
+        return {'cci': talib.CCI(d['high'], d['low'], d['close'], timeperiod=self.config.cci_period)}
 
-        # ADX
-        df['adx'] = talib.ADX(h, l, cl, timeperiod=c.adx_period)
+    # ADX
+    def _calc_adx(self, d):
+        return {'adx': talib.ADX(d['high'], d['low'], d['close'], timeperiod=self.config.adx_period)}
 
-        # Bollinger Bands
-        df['bb_upper'], df['bb_middle'], df['bb_lower'] = talib.BBANDS(
-            cl,
+    # Bollinger Bands
+    def _calc_bbands(self, d):
+        c = self.config
+        upper, middle, lower = talib.BBANDS(
+            d['close'],
             timeperiod=c.bb_period,
             nbdevup=c.bb_std,
             nbdevdn=c.bb_std
         )
-        df['bb_width']     = df['bb_upper'] - df['bb_lower']
-        df['bb_width_sma'] = talib.SMA(
-            df['bb_width'].values, timeperiod=c.bb_period
-        )
+        return {'bb_upper': upper, 'bb_middle': middle, 'bb_lower': lower}
+
+    def _calc_bb_width(self, d):
+        return {'bb_width': d['bb_upper'] - d['bb_lower']}
 
-        # ATR
-        df['atr'] = talib.ATR(h, l, cl, timeperiod=c.atr_period)
+    def _calc_bb_width_sma(self, d):
+        return {'bb_width_sma': talib.SMA(d['bb_width'], timeperiod=self.config.bb_period)}
 
-        # Volume SMA
-        df['volume_sma'] = talib.SMA(v, timeperiod=c.volume_sma_period)
+    # ATR
+    def _calc_atr(self, d):
+        return {'atr': talib.ATR(d['high'], d['low'], d['close'], timeperiod=self.config.atr_period)}
 
-        # OBV
-        df['obv'] = talib.OBV(cl, v)
+    # Volume SMA
+    def _calc_volume_sma(self, d):
+        return {'volume_sma': talib.SMA(d['volume'], timeperiod=self.config.volume_sma_period)}
 
-        # Z-Score
-        sma = talib.SMA(cl, timeperiod=c.z_score_period)
-        std = talib.STDDEV(cl, timeperiod=c.z_score_period)
-        df['z_score'] = np.where(std != 0, (cl - sma) / std, 0)
+    # OBV
+    def _calc_obv(self, d):
+        return {'obv': talib.OBV(d['close'], d['volume'])}
 
-        logger.info(f"Indicators calculated — {len(df)} candles")
-        return df
\ No newline at end of file
+    # Z-Score
+    def _calc_z_score(self, d):
+        cl  = d['close']
+        sma = talib.SMA(cl, timeperiod=self.config.z_score_period)
+        std = talib.STDDEV(cl, timeperiod=self.config.z_score_period)
+        return {'z_score': np.where(std != 0, (cl - sma) / std, 0)}
@@ -0,0 +1,124 @@
+"""
+Intrabar exit simulation for SYNAPSE web app.
+A 5Min or 1Hour candle that reaches both a stop and a target can't say which
+came first. IntrabarSimulator replays only those candles from cached 1Min
+bars — the rest of the trade stays at the backtest's own resolution —
+so partial exits and the trailing stop resolve in the order they happened.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .backtest_engine import EXIT_END, FIRST_HORIZON, LEVELS, normalise, resolve_exits
+from .bar_store import BarStore
+from .logger import get_logger
+from .resample import MINUTE_NS
+
+logger = get_logger()
+
+
+def child_ranges(parent_index: pd.DatetimeIndex, child_index: pd.DatetimeIndex,
+                 minutes: Optional[int] = None) -> tuple:
+    """
+    [start, stop) rows of the child bars inside each parent bar — from the
+    parent's timestamp up to the next parent (or `minutes` later, whichever
+    is first). Two searchsorted passes; lookups afterwards are O(1).
+    """
+    parent = parent_index.asi8
+    child  = child_index.asi8
+    end    = np.r_[parent[1:], np.iinfo(np.int64).max]
+    if minutes:
+        end = np.minimum(end, parent + minutes * MINUTE_NS)
+    return np.searchsorted(child, parent, side='left'), np.searchsorted(child, end, side='left')
+
+
+class IntrabarSimulator:
+    """
+    Pass to BacktestEngine(config, intrabar=...). The backtest flags trades
+    whose outcome hinged on the order inside one candle; refine() replays
+    each from that candle on a mixed path — 1Min bars for every ambiguous
+    candle, the backtest's own candles elsewhere — until no drillable
+    ambiguity is left. Ties inside a single 1Min bar stay stop-first.
+    """
+
+    def __init__(self, child: pd.DataFrame, parent_index: pd.DatetimeIndex, minutes: Optional[int] = None):
+        self.o, self.h, self.l = (child[k].to_numpy(dtype=np.float64) for k in ('open', 'high', 'low'))
+        self.start, self.stop  = child_ranges(parent_index, child.index, minutes)
+        self.drilled = 0
+
+    @classmethod
+    def from_store(cls, store: BarStore, symbol: str, parent_index: pd.DatetimeIndex,
+                   minutes: Optional[int] = None) -> 'IntrabarSimulator':
+        """1Min bars for the parent range, read from the on-disk bar store."""
+        end   = parent_index[-1] + pd.Timedelta(minutes=minutes or 24 * 60)
+        child = store.read(symbol, '1Min', parent_index[0].to_pydatetime(), end.to_pydatetime())
+        return cls(child, parent_index, minutes)
+
+    def refine(self, o, h, l, c, signal, levels: Dict[str, np.ndarray],
+               entries: np.ndarray, exits: Dict[str, np.ndarray]) -> int:
+        """Re-resolve every ambiguous candidate entry in place. Returns how many were replayed."""
+        rows = np.flatnonzero(exits['ambiguous'] & (exits['amb_idx'] >= 0))
+        rows = rows[self.stop[exits['amb_idx'][rows]] > self.start[exits['amb_idx'][rows]]]
+        for k in rows:
+            self._replay(o, h, l, c, signal, levels, int(entries[k]), k, exits)
+        if len(rows):
+            logger.info(f"Intrabar — {len(rows)} ambiguous entries replayed, {self.drilled} candles drilled")
+        return len(rows)
+
+    def _replay(self, o, h, l, c, signal, levels, i, k, exits) -> None:
+        n       = len(c)
+        side    = np.array([float(signal[i])])
+        lv      = {name: levels[name][i:i + 1] for name in LEVELS}
+        drilled = {int(exits['amb_idx'][k])}
+        last    = min(n - 1, int(exits['exit_idx'][k]) + FIRST_HORIZON)
+
+        while True:
+            owner, is_child, po, ph, pl = self._path(o, h, l, i + 1, last, drilled)
+            steps = len(owner)
+            r = resolve_exits(side, *normalise(side, po[None], ph[None], pl[None]),
+                              np.ones((1, steps), dtype=bool), lv)
+
+            t_amb, t_exit = int(r['t_amb'][0]), int(r['t_exit'][0])
+            # Earliest ambiguity on a parent candle that has 1Min bars — a
+            # tie inside one 1Min bar before it doesn't end the search
+            drill = [t for t in sorted(r['t_ambs'][:, 0].tolist())
+                     if t < steps and not is_child[t] and self.stop[owner[t]] > self.start[owner[t]]]
+            if drill:
+                drilled.add(int(owner[drill[0]]))
+                continue
+            if t_exit >= steps and last < n - 1:
+                last = min(n - 1, last + 4 * (last - i))
+                continue
+            break
+
+        self.drilled += len(drilled)
+        done = t_exit < steps
+        exits['exit_idx'][k]  = owner[t_exit] if done else n - 1
+        exits['reason'][k]    = r['reason'][0] if done else EXIT_END
+        exits['exit_fill'][k] = r['exit_fill'][0] if done else c[-1]
+        exits['ambiguous'][k] = t_amb < steps
+        exits['amb_idx'][k]   = owner[t_amb] if t_amb < steps else -1
+        for p in ('p1', 'p2'):
+            t = int(r[f't_{p}'][0])
+            exits[f'{p}_idx'][k]  = owner[t] if t < steps else -1
+            exits[f'{p}_fill'][k] = r[f'{p}_fill'][0] if t < steps else np.nan
+
+    def _path(self, o, h, l, first: int, last: int, drilled: set) -> tuple:
+        """
+        Parent candles first..last with each drilled candle swapped for its
+        1Min bars. Returns the parent of every step, whether it's a 1Min
+        bar, and the open / high / low of the path.
+        """
+        parents = np.arange(first, last + 1)
+        drill   = np.isin(parents, list(drilled))
+        lens    = np.where(drill, self.stop[parents] - self.start[parents], 1)
+
+        owner    = np.repeat(parents, lens)
+        is_child = np.repeat(drill, lens)
+        offset   = np.arange(len(owner)) - np.repeat(np.cumsum(lens) - lens, lens)
+        row      = np.where(is_child, np.repeat(self.start[parents], lens) + offset, 0)
+
+        pick = lambda parent, child: np.where(is_child, child[row], parent[owner])
+        return owner, is_child, pick(o, self.o), pick(h, self.h), pick(l, self.l)
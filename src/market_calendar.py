@@ -0,0 +1,185 @@
+"""
+NYSE trading calendar for SYNAPSE web app.
+Rule-based holidays and early closes — enough to work out how far back a
+lookback fetch has to start to contain N candles, without an extra dependency.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import pandas as pd
+
+MARKET_TZ = 'America/New_York'
+
+REGULAR_OPEN  = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE   = time(13, 0)
+
+# Pre- and post-market — bars can print any time in this window on a session day
+EXTENDED_OPEN  = time(4, 0)
+EXTENDED_CLOSE = time(20, 0)
+
+REGULAR_MINUTES = 390
+EARLY_MINUTES   = 210
+
+# Sessions of margin on top of the estimate — thinly traded symbols can skip
+# minutes, and the estimate only counts regular-hours slots anyway
+SLACK_SESSIONS = 1
+
+# Hard stop for the backwards walk (~25 years of calendar days)
+MAX_LOOKBACK_DAYS = 25 * 366
+
+
+def _observed(d: date) -> date:
+    """Saturday holidays are observed Friday, Sunday holidays Monday."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th weekday (Mon=0) of a month; n=-1 for the last one."""
+    if n > 0:
+        d = date(year, month, 1)
+        d += timedelta(days=(weekday - d.weekday()) % 7)
+        return d + timedelta(weeks=n - 1)
+
+    d = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> frozenset:
+    """Full-day NYSE closures for a year."""
+    days = {
+        _nth_weekday(year, 1, 0, 3),               # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),               # Presidents' Day
+        _easter(year) - timedelta(days=2),         # Good Friday
+        _nth_weekday(year, 5, 0, -1),              # Memorial Day
+        _observed(date(year, 7, 4)),               # Independence Day
+        _nth_weekday(year, 9, 0, 1),               # Labor Day
+        _nth_weekday(year, 11, 3, 4),              # Thanksgiving
+        _observed(date(year, 12, 25)),             # Christmas
+    }
+
+    # New Year's Day on a Saturday is not moved back into the old year
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))     # Juneteenth
+
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year: int) -> frozenset:
+    """13:00 ET closes — July 3rd, Black Friday, Christmas Eve."""
+    days = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+
+    july_4 = date(year, 7, 4)
+    if 1 <= july_4.weekday() <= 4:
+        days.add(july_4 - timedelta(days=1))
+
+    christmas_eve = date(year, 12, 24)
+    if christmas_eve.weekday() <= 3:
+        days.add(christmas_eve)
+
+    return frozenset(days)
+
+
+def is_session(d: date) -> bool:
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def session_minutes(d: date) -> int:
+    """Regular-hours length of a session, 0 if the market is closed."""
+    if not is_session(d):
+        return 0
+    return EARLY_MINUTES if d in early_closes(d.year) else REGULAR_MINUTES
+
+
+def session_open(d: date) -> pd.Timestamp:
+    """9:30 ET on d, as a tz-aware exchange-time Timestamp."""
+    return pd.Timestamp(datetime.combine(d, REGULAR_OPEN)).tz_localize(MARKET_TZ)
+
+
+def trading_between(start: datetime, end: datetime) -> bool:
+    """
+    Whether any extended-hours session (4:00–20:00 ET) overlaps the
+    naive UTC range (start, end] — False means no bar can have printed.
+    """
+    lo  = pd.Timestamp(start, tz='UTC').tz_convert(MARKET_TZ)
+    hi  = pd.Timestamp(end, tz='UTC').tz_convert(MARKET_TZ)
+    day = lo.date()
+    while day <= hi.date():
+        if is_session(day):
+            opened = pd.Timestamp(datetime.combine(day, EXTENDED_OPEN)).tz_localize(MARKET_TZ)
+            closed = pd.Timestamp(datetime.combine(day, EXTENDED_CLOSE)).tz_localize(MARKET_TZ)
+            if opened < hi and closed > lo:
+                return True
+        day += timedelta(days=1)
+    return False
+
+
+def lookback_start(end: datetime, candles: int, timeframe_str: str,
+                   timeframe_minutes: int) -> datetime:
+    """
+    Earliest start (naive UTC, like the rest of DataLoader) whose window up
+    to `end` holds at least `candles` bars of the timeframe.
+
+    Walks back session by session counting regular-hours slots only —
+    extended-hours bars are a bonus that gets trimmed off afterwards.
+    """
+    end_local = pd.Timestamp(end, tz='UTC').tz_convert(MARKET_TZ)
+    day       = end_local.date()
+    needed    = candles
+    slack     = SLACK_SESSIONS
+    weeks     = set()
+
+    for _ in range(MAX_LOOKBACK_DAYS):
+        minutes = session_minutes(day)
+
+        if minutes:
+            opened = session_open(day)
+            if day == end_local.date():
+                elapsed = (end_local - opened).total_seconds() // 60
+                minutes = int(min(max(elapsed, 0), minutes))
+
+            if minutes:
+                if timeframe_str == '1Day':
+                    needed -= 1
+                elif timeframe_str == '1Week':
+                    week = day.isocalendar()[:2]
+                    if week not in weeks:
+                        weeks.add(week)
+                        needed -= 1
+                else:
+                    needed -= minutes // timeframe_minutes
+
+            if needed <= 0:
+                if slack == 0:
+                    return opened.tz_convert('UTC').tz_localize(None).to_pydatetime()
+                slack -= 1
+
+        day -= timedelta(days=1)
+
+    raise ValueError(f'Could not fit {candles} {timeframe_str} candles in the trading calendar.')
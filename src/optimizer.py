@@ -0,0 +1,172 @@
+"""
+Parameter optimization for SYNAPSE web app.
+Grid or random search over the Config decision thresholds and risk
+multiples, spread over a process pool. Indicators don't depend on these
+fields, so they are computed once per data set and placed in shared
+memory; workers attach to the block instead of receiving a pickled copy
+per task.
+"""
+
+import copy
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .backtest_engine import STATS, BacktestEngine
+from .config import Config
+from .decision_engine import DecisionEngine
+from .indicator_frame import IndicatorFrame
+from .indicators import IndicatorCalculator
+from .logger import get_logger
+from .risk_manager import RiskManager
+from .vwap import vwap
+
+logger = get_logger()
+
+# Config fields a search may vary — none of them changes an indicator
+OPTIMIZABLE = (
+    'adx_threshold', 'rsi_oversold', 'rsi_overbought', 'roc_strong_threshold',
+    'cci_threshold', 'bb_width_expansion_factor', 'volume_participation_factor',
+    'z_score_extreme_threshold',
+    'base_sl_atr_multiple', 'base_tp_atr_multiple', 'partial_exit_1_ratio', 'partial_exit_2_ratio',
+)
+
+# Metrics where lower ranks higher; every other BacktestEngine.stats key ranks descending
+MINIMIZE = {'max_drawdown'}
+
+# Most evaluations handed to a worker per round trip (fewer on small searches,
+# so every core gets work)
+TASK_CHUNK = 8
+
+
+def grid(space: Dict[str, Sequence]) -> List[Dict]:
+    """Every combination of the listed values."""
+    fields = list(space)
+    return [dict(zip(fields, values)) for values in itertools.product(*(space[f] for f in fields))]
+
+
+def random_search(space: Dict[str, Sequence], n: int, seed: Optional[int] = None) -> List[Dict]:
+    """n random points — a (low, high) tuple draws uniformly, a list picks one of its values."""
+    rng    = np.random.default_rng(seed)
+    points = [{} for _ in range(n)]
+    for field, spec in space.items():
+        if isinstance(spec, tuple) and len(spec) == 2:
+            values = rng.uniform(spec[0], spec[1], n)
+        else:
+            values = np.asarray(spec, dtype=object)[rng.integers(0, len(spec), n)]
+        for point, value in zip(points, values):
+            point[field] = float(value)
+    return points
+
+
+def prepare_frame(config: Config, df: pd.DataFrame) -> IndicatorFrame:
+    """Bars plus every indicator the decision and the backtest read, computed once."""
+    columns = DecisionEngine(config).required_columns()
+    frame   = IndicatorCalculator(config).compute(df, columns=columns)
+    if 'vwap' in frame:
+        frame['vwap'] = vwap(frame)['vwap']
+    return frame
+
+
+class ParameterOptimizer:
+
+    def __init__(self, config: Config, workers: Optional[int] = None):
+        self.config  = config
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, frame: IndicatorFrame, candidates: List[Dict], metric: str = 'total_pnl',
+            top: Optional[int] = None) -> List[Dict]:
+        """
+        Backtest every candidate ({field: value}) on a prepared frame
+        (prepare_frame) and rank by `metric`, best first. Each result is
+        {'params': ..., 'stats': ...}.
+        """
+        for point in candidates:
+            unknown = set(point) - set(OPTIMIZABLE)
+            if unknown:
+                raise ValueError(f'Not an optimizable field: {", ".join(sorted(unknown))}')
+        if metric not in STATS:
+            raise ValueError(f'Unknown metric {metric!r} — use one of {", ".join(STATS)}')
+
+        results = rank(self.evaluate(frame, [(point, None) for point in candidates]), metric)
+        logger.info(f"Optimization — {len(candidates)} candidates on {self.workers} workers, "
+                    f"best {metric} = {results[0]['stats'][metric] if results else None}")
+        return results[:top] if top else results
+
+    def evaluate(self, frame: IndicatorFrame, tasks: List[tuple], detail: bool = False) -> List[Dict]:
+        """
+        Backtest (params, window) tasks, in order. window is (start, stop)
+        candles of the frame, or None for all of it. With detail, results
+        also carry the trades and equity of each run.
+        """
+        tasks = [(point, window, detail) for point, window in tasks]
+        if self.workers == 1 or len(tasks) <= 1:
+            return [_evaluate(self.config, frame, task) for task in tasks]
+        return self._run_pool(frame, tasks)
+
+    def _run_pool(self, frame: IndicatorFrame, tasks: List[tuple]) -> List[Dict]:
+        """Frame buffer into one shared block; workers attach once and get only parameters per task."""
+        shm = shared_memory.SharedMemory(create=True, size=max(frame.buffer.nbytes, 1))
+        try:
+            np.ndarray(frame.buffer.shape, dtype=np.float64, buffer=shm.buf)[:] = frame.buffer
+
+            spec = (shm.name, frame.buffer.shape, frame.columns, frame.index, self.config)
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_attach, initargs=spec) as pool:
+                chunk = max(1, min(TASK_CHUNK, len(tasks) // (self.workers * 4)))
+                return list(pool.map(_evaluate_shared, tasks, chunksize=chunk))
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+def rank(results: List[Dict], metric: str) -> List[Dict]:
+    """Best first by a BacktestEngine.stats key."""
+    return sorted(results, key=lambda r: r['stats'][metric], reverse=metric not in MINIMIZE)
+
+
+# ---------------------------------------------------------------------------- #
+# WORKER SIDE
+# ---------------------------------------------------------------------------- #
+
+_worker = {}
+
+
+def _attach(name: str, shape: tuple, columns: list, index: pd.DatetimeIndex, config: Config) -> None:
+    """Pool initializer — map the shared block as this worker's frame."""
+    # Pool workers share the parent's resource tracker, so the block is
+    # still unlinked exactly once, by the parent
+    shm    = shared_memory.SharedMemory(name=name)
+    buffer = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    buffer.flags.writeable = False
+
+    _worker.update(shm=shm, config=config, frame=IndicatorFrame.wrap(index, columns, buffer))
+    get_logger().setLevel(logging.WARNING)
+
+
+def _evaluate_shared(task: tuple) -> Dict:
+    return _evaluate(_worker['config'], _worker['frame'], task)
+
+
+def _evaluate(base: Config, frame: IndicatorFrame, task: tuple) -> Dict:
+    """One (params, window, detail) task: decisions, risk distances and a backtest on the shared indicators."""
+    point, window, detail = task
+    config = copy.copy(base)
+    for field, value in point.items():
+        setattr(config, field, value)
+    if window is not None:
+        frame = frame.slice(*window)
+
+    decisions = DecisionEngine(config).make_decisions(frame)
+    sl, tp    = RiskManager(config).risk_distances(decisions['signal'], frame['atr'], frame['z_score'])
+    result    = BacktestEngine(config).run(frame, decisions['signal'], sl, tp)
+
+    out = {'params': point, 'stats': result['stats']}
+    if detail:
+        out.update(trades=result['trades'], equity=result['equity'])
+    return out
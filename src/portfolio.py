@@ -0,0 +1,263 @@
+"""
+Portfolio backtest for SYNAPSE web app.
+Runs many symbols against one pool of capital. Every symbol's bars are laid
+end to end and searched for exits in one BacktestEngine pass; the results
+are placed on a common timestamp index, where entries are admitted in time
+order under the position limits and sized from the RiskManager risk
+distance. Equity is marked to market on (symbols × timestamps) arrays.
+
+Sizing: risk_per_trade of realized equity to the stop (risk_amount per
+unit), capped at max_position_pct of equity and by free cash, whole units
+only. A position's capital (entry notional, shorts too) is held until its
+final exit; its PnL, partials included, is realized then. Entries at one
+timestamp are admitted in symbol order, after the exits of that timestamp.
+"""
+
+import heapq
+import math
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtest_engine import EXIT_REASONS, BacktestEngine, _index
+from .config import Config
+from .decision_engine import DecisionEngine
+from .logger import get_logger
+from .risk_manager import RiskManager
+
+logger = get_logger()
+
+# Symbols marked to market per pass of the equity curve
+MARK_CHUNK = 16
+
+
+def symbol_inputs(config: Config, frame) -> Tuple:
+    """(bars, signal, sl_distance, tp_distance) of one symbol from a prepared frame (optimizer.prepare_frame)."""
+    decisions = DecisionEngine(config).make_decisions(frame)
+    sl, tp    = RiskManager(config).risk_distances(decisions['signal'], frame['atr'], frame['z_score'])
+    return frame, decisions['signal'], sl, tp
+
+
+class PortfolioBacktest:
+
+    def __init__(self, config: Config):
+        self.config  = config
+        self._engine = BacktestEngine(config)
+        self._risk   = RiskManager(config)
+
+    def run(self, symbols: Dict[str, Tuple], initial_capital: float = 100_000.0) -> Dict:
+        """
+        Backtest {symbol: (bars, signal, sl_distance, tp_distance)} — the
+        arguments of BacktestEngine.run, one tuple per symbol — on shared capital.
+
+        Returns:
+            trades    — DataFrame, one row per position taken
+            equity    — Series on the common timestamp index
+            positions — Series, open positions at every timestamp
+            stats     — BacktestEngine.stats of the portfolio
+        """
+        names = list(symbols)
+        data  = self._stack(symbols)
+        index = data['index']
+
+        # Candidates of every symbol, exits found in one pass
+        c, sym, local = data['close'], data['symbol'], data['local']
+        signal  = data['signal']
+        levels  = self._risk.risk_level_columns(c, signal, data['sl'], data['tp'])
+        end     = data['end'][sym]
+        entries = np.flatnonzero((signal != 0) & (local >= self.config.min_warmup_candles)
+                                 & (np.arange(len(c)) < end) & ~np.isnan(levels['stop_loss']))
+        exits   = self._engine._exits(data['open'], data['high'], data['low'], c, signal, levels,
+                                      entries, last=end[entries])
+
+        side  = signal[entries].astype(np.float64)
+        px    = c[entries]
+        gain  = self._engine.unit_pnl(side, px, exits)
+        pos   = data['pos']
+        cand  = {
+            'symbol':  sym[entries],
+            'entry':   entries,
+            'entry_t': pos[entries],
+            'exit_t':  pos[exits['exit_idx']],
+            'price':   px,
+            'risk':    levels['risk_amount'][entries],
+            'gain':    gain,
+        }
+
+        taken, units = self._allocate(cand, len(names), initial_capital)
+        ex     = {k: v[taken] for k, v in exits.items()}
+        trades = self._trades(names, index, data, cand, taken, units, ex, side[taken], levels)
+        equity, positions = self._mark(data, ex, taken, cand, units, initial_capital)
+
+        logger.info(f"Portfolio backtest — {len(trades)} trades in {len(names)} symbols over "
+                    f"{len(index)} timestamps from {len(entries)} candidate entries")
+        return {'trades': trades, 'equity': equity, 'positions': positions,
+                'stats': BacktestEngine.stats(trades, equity, initial_capital)}
+
+    # ------------------------------------------------------------------ #
+    # ALIGNMENT
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _stack(symbols: Dict[str, Tuple]) -> Dict[str, np.ndarray]:
+        """
+        Every symbol's bars and decisions end to end, with the symbol, the
+        row within the symbol and the position on the common index of each.
+        """
+        cols  = {k: [] for k in ('open', 'high', 'low', 'close', 'signal', 'sl', 'tp', 'ts')}
+        sizes = []
+        for bars, signal, sl, tp in symbols.values():
+            for k in ('open', 'high', 'low', 'close'):
+                cols[k].append(np.asarray(bars[k], dtype=np.float64))
+            cols['signal'].append(np.asarray(signal))
+            cols['sl'].append(np.asarray(sl, dtype=np.float64))
+            cols['tp'].append(np.asarray(tp, dtype=np.float64))
+            cols['ts'].append(_index(bars))
+            sizes.append(len(cols['close'][-1]))
+
+        out   = {k: np.concatenate(v) for k, v in cols.items() if k != 'ts'}
+        ts    = np.concatenate([t.asi8 for t in cols['ts']])
+        first = np.r_[0, np.cumsum(sizes)[:-1]].astype(np.int64)
+
+        common = np.unique(ts)
+        tz     = next((t.tz for t in cols['ts'] if len(t)), None)
+        index  = pd.DatetimeIndex(common.view('datetime64[ns]'))
+        out.update(
+            index  = index.tz_localize('UTC').tz_convert(tz) if tz is not None else index,
+            symbol = np.repeat(np.arange(len(sizes)), sizes),
+            local  = np.arange(len(ts)) - np.repeat(first, sizes),
+            pos    = np.searchsorted(common, ts),
+            first  = first,
+            end    = first + np.asarray(sizes, dtype=np.int64) - 1,
+        )
+        return out
+
+    # ------------------------------------------------------------------ #
+    # ALLOCATION
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, cand, n_symbols, initial_capital) -> tuple:
+        """
+        Candidates admitted under the limits, in time order, and their units.
+
+        One walk over the candidates by (timestamp, symbol). While every
+        slot is taken it jumps straight to the next exit, so its length
+        follows the signals that could trade, not the candles.
+        """
+        cfg   = self.config
+        order = np.lexsort((cand['symbol'], cand['entry_t']))
+        times = cand['entry_t'][order]
+
+        walk    = order.tolist()
+        entry_t = times.tolist()
+        exit_t  = cand['exit_t'].tolist()
+        sym     = cand['symbol'].tolist()
+        price   = cand['price'].tolist()
+        risk    = cand['risk'].tolist()
+        gain    = cand['gain'].tolist()
+
+        busy = [-1] * n_symbols   # exit timestamp of each symbol's open position
+        open_, taken, units = [], [], []
+        realized, committed = float(initial_capital), 0.0
+
+        p = 0
+        while p < len(walk):
+            k, t = walk[p], entry_t[p]
+            # Exits up to and including this timestamp free their capital first
+            while open_ and open_[0][0] <= t:
+                n = heapq.heappop(open_)[1]
+                j, q = taken[n], units[n]
+                realized  += gain[j] * q
+                committed -= price[j] * q
+
+            s = sym[k]
+            if busy[s] > t:
+                p += 1
+                continue
+            if len(open_) >= cfg.max_positions:
+                # Nothing is admitted before the next exit
+                p = int(np.searchsorted(times, open_[0][0], side='left'))
+                continue
+
+            want = min(realized * cfg.risk_per_trade / risk[k] if risk[k] > 0 else 0.0,
+                       realized * cfg.max_position_pct / price[k])
+            qty  = math.floor(min(want, (realized - committed) / price[k]))
+            if qty >= 1:
+                heapq.heappush(open_, (exit_t[k], len(taken)))
+                taken.append(k)
+                units.append(float(qty))
+                busy[s] = exit_t[k]
+            p += 1
+
+        return np.asarray(taken, dtype=np.int64), np.asarray(units)
+
+    # ------------------------------------------------------------------ #
+    # RESULTS
+    # ------------------------------------------------------------------ #
+
+    def _trades(self, names, index, data, cand, taken, units, exits, side, levels) -> pd.DataFrame:
+        """Trade list of the portfolio, times on the common index."""
+        idx   = cand['entry'][taken]
+        local = data['local']
+        pnl   = cand['gain'][taken] * units
+        trades = pd.DataFrame({
+            'symbol':         np.asarray(names, dtype=object)[cand['symbol'][taken]],
+            'entry_time':     index[cand['entry_t'][taken]],
+            'exit_time':      index[cand['exit_t'][taken]],
+            'direction':      np.where(side > 0, 'LONG', 'SHORT'),
+            'units':          units,
+            'entry_price':    cand['price'][taken],
+            'stop_loss':      levels['stop_loss'][idx],
+            'take_profit':    levels['take_profit'][idx],
+            'partial_1_fill': exits['p1_fill'],
+            'partial_2_fill': exits['p2_fill'],
+            'exit_price':     exits['exit_fill'],
+            'exit_reason':    np.asarray(EXIT_REASONS)[exits['reason']],
+            'bars_held':      local[exits['exit_idx']] - local[idx],
+            'pnl':            pnl,
+            'return':         cand['gain'][taken] / cand['price'][taken],
+            'r_multiple':     cand['gain'][taken] / cand['risk'][taken],
+            'ambiguous':      exits['ambiguous'],
+        })
+        return trades.sort_values('entry_time', kind='stable', ignore_index=True)
+
+    def _mark(self, data, exits, taken, cand, units, initial_capital) -> tuple:
+        """Equity and open positions on the common index, from (symbols × timestamps) unit and price arrays."""
+        n_sym, n_t = len(data['first']), len(data['index'])
+        pos, c     = data['pos'], self.config
+        sym        = cand['symbol'][taken]
+        side       = np.where(data['signal'][cand['entry'][taken]] > 0, 1.0, -1.0) * units
+
+        f1 = np.where(exits['p1_idx'] >= 0, c.partial_exit_1_size, 0.0)
+        f2 = np.where(exits['p2_idx'] >= 0, c.partial_exit_2_size, 0.0)
+        fills = [
+            (cand['entry_t'][taken], side, cand['price'][taken]),
+            (np.where(exits['p1_idx'] >= 0, pos[np.maximum(exits['p1_idx'], 0)], -1), -side * f1, exits['p1_fill']),
+            (np.where(exits['p2_idx'] >= 0, pos[np.maximum(exits['p2_idx'], 0)], -1), -side * f2, exits['p2_fill']),
+            (cand['exit_t'][taken], -side * (1.0 - f1 - f2), exits['exit_fill']),
+        ]
+
+        cash = np.zeros(n_t)
+        qty  = np.zeros((n_sym, n_t))
+        for at, q, price in fills:
+            ok = at >= 0
+            np.add.at(cash, at[ok], -(q * np.nan_to_num(price))[ok])
+            np.add.at(qty, (sym[ok], at[ok]), q[ok])
+
+        # Last close of every symbol at every timestamp (forward filled)
+        close = np.full((n_sym, n_t), np.nan)
+        close[data['symbol'], pos] = data['close']
+
+        marked = np.zeros(n_t)
+        for lo in range(0, n_sym, MARK_CHUNK):
+            px   = close[lo:lo + MARK_CHUNK]
+            seen = np.where(np.isnan(px), 0, np.arange(n_t))
+            np.maximum.accumulate(seen, axis=1, out=seen)
+            px   = np.nan_to_num(np.take_along_axis(px, seen, axis=1))
+            marked += (np.cumsum(qty[lo:lo + MARK_CHUNK], axis=1) * px).sum(axis=0)
+
+        opened = np.bincount(cand['entry_t'][taken], minlength=n_t)
+        closed = np.bincount(cand['exit_t'][taken], minlength=n_t)
+        equity = pd.Series(initial_capital + np.cumsum(cash) + marked, index=data['index'], name='equity')
+        return equity, pd.Series(np.cumsum(opened - closed), index=data['index'], name='positions')
@@ -0,0 +1,65 @@
+"""
+Local timeframe resampling for SYNAPSE web app.
+Builds higher-timeframe OHLCV bars from 1Min bars so switching timeframes
+on the same symbol doesn't need another Alpaca request.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .bar_store import BAR_COLUMNS, empty_bars
+from .market_calendar import MARKET_TZ
+
+# Buckets are anchored to the 9:30 ET open, so hourly bars read 9:30–10:30,
+# 10:30–11:30 ... Minute timeframes that divide 30 land on clock boundaries,
+# same as Alpaca's own bars.
+SESSION_OPEN_NS = (9 * 60 + 30) * 60 * 1_000_000_000
+DAY_NS          = 24 * 60 * 60 * 1_000_000_000
+MINUTE_NS       = 60 * 1_000_000_000
+
+
+def resample_bars(df: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """
+    Aggregate sorted 1Min OHLCV bars into `minutes`-wide bars.
+
+    Buckets never cross a calendar day in exchange time, and pre/post-market
+    bars fall into buckets on the same 9:30-anchored grid. One vectorised pass
+    with ufunc.reduceat — no groupby, no Python loop over buckets.
+    """
+    if df.empty:
+        return empty_bars()
+
+    index = df.index if df.index.tz is not None else df.index.tz_localize('UTC')
+
+    # Wall-clock nanoseconds in exchange time
+    local_ns = index.tz_convert(MARKET_TZ).tz_localize(None).asi8
+    day      = local_ns // DAY_NS * DAY_NS
+    width    = minutes * MINUTE_NS
+    offset   = local_ns - day - SESSION_OPEN_NS
+    bucket   = day + SESSION_OPEN_NS + (offset // width) * width
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends   = np.r_[starts[1:], len(bucket)] - 1
+
+    o = df['open'].to_numpy(dtype=np.float64)
+    h = df['high'].to_numpy(dtype=np.float64)
+    l = df['low'].to_numpy(dtype=np.float64)
+    c = df['close'].to_numpy(dtype=np.float64)
+    v = df['volume'].to_numpy(dtype=np.float64)
+
+    out_index = (
+        pd.DatetimeIndex(bucket[starts])
+        .tz_localize(MARKET_TZ, ambiguous='NaT', nonexistent='shift_forward')
+        .tz_convert('UTC')
+    )
+    out_index.name = 'timestamp'
+
+    out = pd.DataFrame({
+        'open':   o[starts],
+        'high':   np.maximum.reduceat(h, starts),
+        'low':    np.minimum.reduceat(l, starts),
+        'close':  c[ends],
+        'volume': np.add.reduceat(v, starts),
+    }, index=out_index)
+
+    return out[BAR_COLUMNS]
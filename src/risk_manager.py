@@ -5,6 +5,7 @@ This module handles all risk management calculations including stop loss,
 take profit, partial exits, and position sizing.
 """
 
+import numpy as np
 import pandas as pd
 from typing import Dict
 
@@ -43,7 +44,6 @@ class RiskManager:
 
         logger.info(f"Calculating risk parameters for {decision['direction']} trade")
 
-        close_val = decision['close']
         atr_val = decision['atr']
         z_score_val = decision['z_score']
         signal_value = decision['signal']
@@ -59,16 +59,49 @@ class RiskManager:
                 atr_val,
                 z_factor
             )
-            decision.update(self._create_long_risk_params(
-                close_val,
-                sl_distance,
-                tp_distance
-            ))
         else:  # SHORT
             sl_distance, tp_distance = self._calculate_short_risk(
                 atr_val,
                 z_factor
             )
+
+        self.apply_distances(decision, sl_distance, tp_distance)
+
+        logger.info(f"Risk parameters calculated - R:R = {decision['risk_reward_ratio']:.2f}:1")
+
+        return decision
+
+    def risk_distances(self, signal: np.ndarray, atr: np.ndarray, z_score: np.ndarray) -> tuple:
+        """
+        Vectorized stop / target distances for per-candle signals (1 / -1),
+        NaN where there is no trade. Same arithmetic as the scalar path.
+
+        Returns:
+            tuple: (sl_distance, tp_distance) arrays
+        """
+        with np.errstate(invalid='ignore'):
+            z_factor = np.minimum(np.where(np.isnan(z_score), 0.0, np.abs(z_score)), 2.0)
+        long_sl, long_tp   = self._calculate_long_risk(atr, z_factor)
+        short_sl, short_tp = self._calculate_short_risk(atr, z_factor)
+
+        is_long, is_short = signal == 1, signal == -1
+        sl_distance = np.where(is_long, long_sl, np.where(is_short, short_sl, np.nan))
+        tp_distance = np.where(is_long, long_tp, np.where(is_short, short_tp, np.nan))
+        return sl_distance, tp_distance
+
+    def apply_distances(self, decision: Dict, sl_distance: float, tp_distance: float) -> Dict:
+        """
+        Add price levels and R:R for known stop / target distances to a
+        TRADE decision (needs 'close' and 'signal').
+        """
+        close_val = decision['close']
+        if decision['signal'] == 1:
+            decision.update(self._create_long_risk_params(
+                close_val,
+                sl_distance,
+                tp_distance
+            ))
+        else:
             decision.update(self._create_short_risk_params(
                 close_val,
                 sl_distance,
@@ -81,10 +114,34 @@ class RiskManager:
         decision['risk_reward_ratio'] = (
             tp_distance / sl_distance if sl_distance > 0 else 0
         )
+        return decision
 
-        logger.info(f"Risk parameters calculated - R:R = {decision['risk_reward_ratio']:.2f}:1")
+    def risk_levels(self, close: float, signal: int, sl_distance: float, tp_distance: float) -> Dict:
+        """Just the risk fields apply_distances adds, for compact payloads."""
+        levels = self.apply_distances({'close': close, 'signal': signal}, sl_distance, tp_distance)
+        del levels['close'], levels['signal']
+        return levels
 
-        return decision
+    def risk_level_columns(self, close: np.ndarray, signal: np.ndarray,
+                           sl_distance: np.ndarray, tp_distance: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized risk_levels — one array per field, NaN where there is no
+        trade. Same arithmetic as the LONG / SHORT scalar paths.
+        """
+        side  = np.where(signal == 1, 1.0, np.where(signal == -1, -1.0, np.nan))
+        c     = self.config
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'stop_loss':         close - side * sl_distance,
+                'take_profit':       close + side * tp_distance,
+                'partial_exit_1':    close + side * (sl_distance * c.partial_exit_1_ratio),
+                'partial_exit_2':    close + side * (sl_distance * c.partial_exit_2_ratio),
+                'trailing_stop':     close + side * 0.0,
+                'risk_amount':       sl_distance,
+                'reward_amount':     tp_distance,
+                'risk_reward_ratio': np.where(sl_distance > 0, tp_distance / sl_distance,
+                                              np.where(np.isnan(side), np.nan, 0.0)),
+            }
 
     def _calculate_long_risk(self, atr: float, z_factor: float) -> tuple:
         """Calculate stop loss and take profit distances for LONG trade."""
@@ -0,0 +1,298 @@
+"""
+Declarative decision rules for SYNAPSE web app.
+A rule is text such as `ema_9 > ema_21 AND macd > macd_signal AND close > vwap`.
+It is parsed once and compiled into a single NumPy expression that runs over
+whole indicator series. Compiled rules are cached by their text.
+
+Grammar (keywords are case-insensitive):
+
+    rule       := or
+    or         := and ('OR' and)*
+    and        := not ('AND' not)*
+    not        := 'NOT' not | comparison
+    comparison := sum (('>' | '>=' | '<' | '<=' | '==' | '!=') sum)?
+    sum        := product (('+' | '-') product)*
+    product    := unary (('*' | '/') unary)*
+    unary      := '-' unary | atom
+    atom       := number | name | prev(sum[, n]) | abs(sum) | '(' rule ')'
+
+Names that are indicator columns read that column; any other name is a
+strategy parameter (e.g. adx_threshold) supplied at evaluation time.
+prev(x, n) is x shifted n candles back (NaN before the start). As in the
+hand-written layers, comparisons with NaN are False.
+"""
+
+import numbers
+import re
+from functools import lru_cache
+from typing import Dict, Mapping
+
+import numpy as np
+
+from .indicators import COLUMN_NODES, EXTERNAL_COLUMNS
+
+# Every name a rule can read as a column
+RULE_COLUMNS = frozenset(COLUMN_NODES) | frozenset(EXTERNAL_COLUMNS)
+
+_TOKEN     = re.compile(r'\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_]\w*)|(>=|<=|==|!=|[-+*/()<>,]))')
+_KEYWORDS  = {'AND', 'OR', 'NOT'}
+_FUNCTIONS = {'prev', 'abs'}
+_COMPARE   = {'>', '>=', '<', '<=', '==', '!='}
+
+
+class RuleError(ValueError):
+    """A rule that doesn't parse or can't be evaluated."""
+
+
+def _shift(values: np.ndarray, n: int) -> np.ndarray:
+    out = np.full(values.shape, np.nan)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+# ---------------------------------------------------------------------------- #
+# PARSER — recursive descent straight to Python/NumPy source
+# ---------------------------------------------------------------------------- #
+
+class _Parser:
+    """Turns rule text into NumPy source. Tracks value types so misuse fails here, not at evaluation."""
+
+    def __init__(self, text: str):
+        self.text     = text
+        self.tokens   = self._tokenize(text)
+        self.pos      = 0
+        self.columns  = set()
+        self.params   = set()
+        self.lookback = 0
+
+    def _tokenize(self, text: str) -> list:
+        tokens, pos = [], 0
+        text = text.rstrip()
+        while pos < len(text):
+            m = _TOKEN.match(text, pos)
+            if not m or m.end() == pos:
+                raise RuleError(f'Unexpected character at {pos}: {text[pos:pos + 10]!r}')
+            number, name, op = m.groups()
+            if number is not None:
+                tokens.append(('num', number))
+            elif name is not None:
+                kind = 'kw' if name.upper() in _KEYWORDS else 'name'
+                tokens.append((kind, name.upper() if kind == 'kw' else name))
+            else:
+                tokens.append(('op', op))
+            pos = m.end()
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, kind=None, value=None):
+        tok = self._peek()
+        if tok[0] is None or (kind and tok[0] != kind) or (value and tok[1] != value):
+            want = value or kind or 'more input'
+            got  = tok[1] if tok[0] else 'end of rule'
+            raise RuleError(f'Expected {want}, got {got!r}')
+        self.pos += 1
+        return tok
+
+    def parse(self) -> str:
+        src, kind = self._or()
+        if self._peek()[0] is not None:
+            raise RuleError(f'Unexpected {self._peek()[1]!r}')
+        if kind != 'bool':
+            raise RuleError('A rule must be a condition (use a comparison)')
+        return src
+
+    def _or(self):
+        left, kind = self._and()
+        while self._peek() == ('kw', 'OR'):
+            self._take()
+            right, rkind = self._and()
+            self._need_bool(kind, rkind, 'OR')
+            left = f'({left} | {right})'
+        return left, kind
+
+    def _and(self):
+        left, kind = self._not()
+        while self._peek() == ('kw', 'AND'):
+            self._take()
+            right, rkind = self._not()
+            self._need_bool(kind, rkind, 'AND')
+            left = f'({left} & {right})'
+        return left, kind
+
+    def _not(self):
+        if self._peek() == ('kw', 'NOT'):
+            self._take()
+            src, kind = self._not()
+            self._need_bool(kind, 'bool', 'NOT')
+            return f'_np.logical_not({src})', 'bool'
+        return self._comparison()
+
+    def _comparison(self):
+        left, kind = self._sum()
+        tok = self._peek()
+        if tok[0] == 'op' and tok[1] in _COMPARE:
+            self._take()
+            right, rkind = self._sum()
+            if kind != 'num' or rkind != 'num':
+                raise RuleError(f'{tok[1]} compares numbers, not conditions')
+            return f'({left} {tok[1]} {right})', 'bool'
+        return left, kind
+
+    def _sum(self):
+        left, kind = self._product()
+        while self._peek() in (('op', '+'), ('op', '-')):
+            op = self._take()[1]
+            right, rkind = self._product()
+            self._need_num(kind, rkind, op)
+            left = f'({left} {op} {right})'
+        return left, kind
+
+    def _product(self):
+        left, kind = self._unary()
+        while self._peek() in (('op', '*'), ('op', '/')):
+            op = self._take()[1]
+            right, rkind = self._unary()
+            self._need_num(kind, rkind, op)
+            left = f'({left} {op} {right})'
+        return left, kind
+
+    def _unary(self):
+        if self._peek() == ('op', '-'):
+            self._take()
+            src, kind = self._unary()
+            self._need_num(kind, 'num', '-')
+            return f'(-{src})', 'num'
+        return self._atom()
+
+    def _atom(self):
+        kind, value = self._peek()
+        if kind == 'num':
+            self._take()
+            return repr(float(value)), 'num'
+
+        if kind == 'op' and value == '(':
+            self._take()
+            src, skind = self._or()
+            self._take('op', ')')
+            return src, skind
+
+        if kind == 'name' and value in _FUNCTIONS and self.tokens[self.pos + 1:self.pos + 2] == [('op', '(')]:
+            return self._function()
+
+        if kind == 'name':
+            self._take()
+            if value in RULE_COLUMNS:
+                self.columns.add(value)
+                return f'c[{value!r}]', 'num'
+            self.params.add(value)
+            return f'p[{value!r}]', 'num'
+
+        raise RuleError(f'Unexpected {value!r}' if kind else 'Rule ends too early')
+
+    def _function(self):
+        name = self._take()[1]
+        self._take('op', '(')
+        arg, kind = self._sum()
+        self._need_num(kind, 'num', name)
+
+        if name == 'abs':
+            self._take('op', ')')
+            return f'_np.abs({arg})', 'num'
+
+        # prev(x[, n]) — n is a literal so the lookback is known up front
+        n = 1
+        if self._peek() == ('op', ','):
+            self._take()
+            n = self._take('num')[1]
+            if not n.isdigit() or int(n) < 1:
+                raise RuleError('prev() takes a whole number of candles >= 1')
+            n = int(n)
+        self._take('op', ')')
+        self.lookback = max(self.lookback, n)
+        return f'_shift({arg}, {n})', 'num'
+
+    @staticmethod
+    def _need_bool(left, right, op):
+        if left != 'bool' or right != 'bool':
+            raise RuleError(f'{op} joins conditions, not numbers')
+
+    @staticmethod
+    def _need_num(left, right, op):
+        if left != 'num' or right != 'num':
+            raise RuleError(f'{op} applies to numbers, not conditions')
+
+
+# ---------------------------------------------------------------------------- #
+# COMPILED RULE
+# ---------------------------------------------------------------------------- #
+
+class Rule:
+    """
+    One compiled rule. columns / params are the indicator columns and
+    strategy parameters it reads; lookback is how many earlier candles
+    prev() reaches back.
+    """
+
+    def __init__(self, text: str):
+        parser = _Parser(text)
+        body   = parser.parse()
+
+        # Nested prev() calls add up — every call at the deepest shift bounds the window
+        self.text     = text
+        self.source   = f'def _rule(c, p):\n    return {body}\n'
+        self.columns  = tuple(sorted(parser.columns))
+        self.params   = tuple(sorted(parser.params))
+        self.lookback = parser.lookback * max(1, body.count('_shift('))
+
+        namespace = {'_np': np, '_shift': _shift}
+        exec(compile(self.source, f'<rule {text!r}>', 'exec'), namespace)
+        self._fn = namespace['_rule']
+
+    def __call__(self, columns: Mapping[str, np.ndarray], params: Mapping[str, float]) -> np.ndarray:
+        """Evaluate on prepared float64 arrays (every name in self.columns present)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._fn(columns, params)
+
+    def evaluate(self, frame, params) -> np.ndarray:
+        """Boolean array over every candle of a frame. params is a mapping or a Config."""
+        n      = len(frame)
+        result = self(gather(frame, self.columns), bind_params(self.params, params))
+        return np.broadcast_to(np.asarray(result, dtype=bool), (n,)).copy()
+
+    def evaluate_at(self, frame, idx: int, params) -> bool:
+        """The rule at one candle — only the lookback window is read."""
+        cols = gather(frame, self.columns, slice(max(0, idx - self.lookback), idx + 1))
+        result = np.asarray(self(cols, bind_params(self.params, params)), dtype=bool)
+        return bool(result if result.ndim == 0 else result[-1])
+
+    def __repr__(self) -> str:
+        return f'Rule({self.text!r})'
+
+
+@lru_cache(maxsize=512)
+def compile_rule(text: str) -> Rule:
+    """Parse + compile once per distinct rule text."""
+    return Rule(text)
+
+
+def gather(frame, names, rows: slice = slice(None)) -> Dict[str, np.ndarray]:
+    """float64 arrays for `names` (over `rows`) from any frame type — missing columns read as NaN."""
+    n = len(range(len(frame))[rows])
+    return {
+        name: np.asarray(frame[name][rows], dtype=np.float64) if name in frame else np.full(n, np.nan)
+        for name in names
+    }
+
+
+def bind_params(names, source) -> Dict[str, float]:
+    """Parameter values from a mapping or an object with attributes (Config)."""
+    values = {}
+    for name in names:
+        value = source.get(name) if isinstance(source, Mapping) else getattr(source, name, None)
+        if isinstance(value, bool) or not isinstance(value, numbers.Real):
+            raise RuleError(f'Unknown rule parameter: {name}')
+        values[name] = float(value)
+    return values
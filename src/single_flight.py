@@ -0,0 +1,63 @@
+"""
+Request coalescing for SYNAPSE web app.
+Concurrent callers with the same key share one computation instead of
+each running their own.
+"""
+
+import threading
+from typing import Any, Callable
+
+from .logger import get_logger
+
+logger = get_logger()
+
+
+class _Call:
+    """One in-flight computation and the callers waiting on it."""
+
+    def __init__(self):
+        self.done    = threading.Event()
+        self.result  = None
+        self.error   = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Only coalesces calls that overlap in time — nothing is cached once the
+    leading call finishes, so the next request always gets fresh data.
+    Exceptions raised by the leader are re-raised in every waiter.
+    """
+
+    def __init__(self):
+        self._lock  = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call   = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                logger.info(f"Coalesced {call.waiters} duplicate request(s) onto one computation")
+            call.done.set()
+
+        return call.result
@@ -0,0 +1,380 @@
+"""
+Streaming indicator calculations for SYNAPSE web app.
+Stateful counterpart of IndicatorCalculator — each new bar updates every
+indicator in constant time instead of recomputing the whole history.
+Seeding follows TA-Lib so values match the batch output after warmup.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .logger import get_logger
+
+logger = get_logger()
+
+NAN = float('nan')
+
+
+def _is_zero(v: float) -> bool:
+    """TA-Lib's TA_IS_ZERO."""
+    return -1e-8 < v < 1e-8
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class _Rolling:
+    """Fixed window with running sum and sum of squares (SMA / STDDEV)."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total  = 0.0
+        self.total2 = 0.0
+
+    def update(self, x: float) -> None:
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.total  -= old
+            self.total2 -= old * old
+        self.window.append(x)
+        self.total  += x
+        self.total2 += x * x
+
+    @property
+    def ready(self) -> bool:
+        return len(self.window) == self.period
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.period if self.ready else NAN
+
+    @property
+    def std(self) -> float:
+        """Population std — TA-Lib's STDDEV, zero for non-positive variance."""
+        if not self.ready:
+            return NAN
+        mean = self.total / self.period
+        var  = self.total2 / self.period - mean * mean
+        return math.sqrt(var) if var >= 1e-8 else 0.0
+
+
+class _EMA:
+    """
+    EMA seeded with the SMA of the `period` values ending at seed_index
+    (TA-Lib seeds at period - 1; MACD's fast line seeds later, see _MACD).
+    """
+
+    def __init__(self, period: int, seed_index: Optional[int] = None):
+        self.k          = 2.0 / (period + 1)
+        self.seed_index = period - 1 if seed_index is None else seed_index
+        self.recent     = deque(maxlen=period)
+        self.count      = 0
+        self.value      = NAN
+
+    def update(self, x: float) -> float:
+        if self.count < self.seed_index:
+            self.recent.append(x)
+        elif self.count == self.seed_index:
+            self.recent.append(x)
+            self.value = sum(self.recent) / len(self.recent)
+            self.recent.clear()
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        self.count += 1
+        return self.value
+
+
+class _MACD:
+    """TA-Lib MACD — both lines start at slow - 1, output once the signal line is seeded."""
+
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.fast   = _EMA(fast, seed_index=slow - 1)
+        self.slow   = _EMA(slow)
+        self.signal = _EMA(signal)
+
+    def update(self, close: float) -> tuple[float, float, float]:
+        fast = self.fast.update(close)
+        slow = self.slow.update(close)
+        if math.isnan(slow):
+            return NAN, NAN, NAN
+
+        macd   = fast - slow
+        signal = self.signal.update(macd)
+        if math.isnan(signal):
+            return NAN, NAN, NAN
+        return macd, signal, macd - signal
+
+
+class _RSI:
+    """Wilder RSI seeded with the average gain/loss of the first `period` changes."""
+
+    def __init__(self, period: int):
+        self.period     = period
+        self.prev_close = None
+        self.count      = 0
+        self.gain       = 0.0
+        self.loss       = 0.0
+
+    def update(self, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return NAN
+
+        diff = close - self.prev_close
+        self.prev_close = close
+        self.count += 1
+        p = self.period
+
+        if self.count <= p:
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+            if self.count < p:
+                return NAN
+            self.gain /= p
+            self.loss /= p
+        else:
+            self.gain *= p - 1
+            self.loss *= p - 1
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+            self.gain /= p
+            self.loss /= p
+
+        total = self.gain + self.loss
+        return 100.0 * (self.gain / total) if not _is_zero(total) else 0.0
+
+
+class _ATR:
+    """Wilder ATR seeded with the SMA of the first `period` true ranges."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count  = 0
+        self.total  = 0.0
+        self.value  = NAN
+
+    def update(self, tr: float) -> float:
+        self.count += 1
+        p = self.period
+        if self.count < p:
+            self.total += tr
+        elif self.count == p:
+            self.value = (self.total + tr) / p
+        else:
+            self.value = (self.value * (p - 1) + tr) / p
+        return self.value
+
+
+class _ADX:
+    """TA-Lib ADX — Wilder-smoothed DM/TR, first output after 2 * period - 1 bars."""
+
+    def __init__(self, period: int):
+        self.period   = period
+        self.count    = 0
+        self.prev     = None            # (high, low, close)
+        self.plus_dm  = 0.0
+        self.minus_dm = 0.0
+        self.tr       = 0.0
+        self.sum_dx   = 0.0
+        self.value    = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return NAN
+
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+        self.count += 1
+        p = self.period
+
+        diff_p = high - prev_high
+        diff_m = prev_low - low
+        plus_dm  = diff_p if (diff_p > 0 and diff_p > diff_m) else 0.0
+        minus_dm = diff_m if (diff_m > 0 and diff_p < diff_m) else 0.0
+        tr       = _true_range(high, low, prev_close)
+
+        if self.count < p:
+            self.plus_dm  += plus_dm
+            self.minus_dm += minus_dm
+            self.tr       += tr
+            return NAN
+
+        self.plus_dm  = self.plus_dm  - self.plus_dm  / p + plus_dm
+        self.minus_dm = self.minus_dm - self.minus_dm / p + minus_dm
+        self.tr       = self.tr - self.tr / p + tr
+
+        dx = None
+        if not _is_zero(self.tr):
+            minus_di = 100.0 * (self.minus_dm / self.tr)
+            plus_di  = 100.0 * (self.plus_dm / self.tr)
+            di_sum   = minus_di + plus_di
+            if not _is_zero(di_sum):
+                dx = 100.0 * (abs(minus_di - plus_di) / di_sum)
+
+        if self.count < 2 * p - 1:
+            self.sum_dx += dx or 0.0
+            return NAN
+        if self.count == 2 * p - 1:
+            self.value = (self.sum_dx + (dx or 0.0)) / p
+        elif dx is not None:
+            self.value = (self.value * (p - 1) + dx) / p
+        return self.value
+
+
+class _CCI:
+    """TA-Lib CCI. Mean deviation needs the window, so this is O(period) per bar."""
+
+    def __init__(self, period: int):
+        self.window = _Rolling(period)
+
+    def update(self, tp: float) -> float:
+        self.window.update(tp)
+        if not self.window.ready:
+            return NAN
+
+        avg      = self.window.mean
+        mean_dev = sum(abs(x - avg) for x in self.window.window) / self.window.period
+        diff     = tp - avg
+        return diff / (0.015 * mean_dev) if (diff != 0.0 and mean_dev != 0.0) else 0.0
+
+
+class StreamingIndicators:
+    """
+    Holds indicator state for one symbol/timeframe.
+
+    Feed history once with warm_up(), then call update() for every new bar.
+    Outputs use the same column names as IndicatorCalculator (+ session VWAP,
+    reset at the first bar of each calendar day of the bar timestamps —
+    UTC for Alpaca bars, the same grouping as the batch VWAP).
+    """
+
+    def __init__(self, config):
+        c = self.config = config
+
+        self._ema_fast   = _EMA(c.ema_fast_period)
+        self._ema_slow   = _EMA(c.ema_slow_period)
+        self._macd       = _MACD(c.macd_fast, c.macd_slow, c.macd_signal)
+        self._rsi        = _RSI(c.rsi_period)
+        self._roc_window = deque(maxlen=c.roc_period + 1)
+        self._cci        = _CCI(c.cci_period)
+        self._adx        = _ADX(c.adx_period)
+        self._bb         = _Rolling(c.bb_period)
+        self._bb_width   = _Rolling(c.bb_period)
+        self._atr        = _ATR(c.atr_period)
+        self._volume     = _Rolling(c.volume_sma_period)
+        self._z          = _Rolling(c.z_score_period)
+
+        self._prev_close = None
+        self._obv        = None
+        self._vwap_day   = None
+        self._vwap_pv    = 0.0
+        self._vwap_vol   = 0.0
+
+        self.bars   = 0
+        self.values = {}
+
+    def update(self, bar: Mapping, timestamp=None) -> Dict[str, float]:
+        """Consume one bar (open/high/low/close/volume) and return every indicator."""
+        h  = float(bar['high'])
+        l  = float(bar['low'])
+        cl = float(bar['close'])
+        v  = float(bar['volume'])
+        c  = self.config
+        out = {}
+
+        # EMAs
+        out['ema_9']  = self._ema_fast.update(cl)
+        out['ema_21'] = self._ema_slow.update(cl)
+
+        # MACD
+        out['macd'], out['macd_signal'], out['macd_hist'] = self._macd.update(cl)
+
+        # RSX (RSI proxy, same as the batch calculator)
+        out['rsx'] = self._rsi.update(cl)
+
+        # ROC
+        self._roc_window.append(cl)
+        if len(self._roc_window) > c.roc_period:
+            base = self._roc_window[0]
+            out['roc'] = (cl / base - 1.0) * 100.0 if base != 0 else 0.0
+        else:
+            out['roc'] = NAN
+
+        # CCI
+        out['cci'] = self._cci.update((h + l + cl) / 3.0)
+
+        # ADX
+        out['adx'] = self._adx.update(h, l, cl)
+
+        # Bollinger Bands
+        self._bb.update(cl)
+        mid = self._bb.mean
+        dev = self._bb.std * c.bb_std
+        out['bb_upper']  = mid + dev
+        out['bb_middle'] = mid
+        out['bb_lower']  = mid - dev
+        out['bb_width']  = out['bb_upper'] - out['bb_lower']
+        if not math.isnan(out['bb_width']):
+            self._bb_width.update(out['bb_width'])
+        out['bb_width_sma'] = self._bb_width.mean
+
+        # ATR
+        if self._prev_close is None:
+            out['atr'] = NAN
+        else:
+            out['atr'] = self._atr.update(_true_range(h, l, self._prev_close))
+
+        # Volume SMA
+        self._volume.update(v)
+        out['volume_sma'] = self._volume.mean
+
+        # OBV — starts at the first bar's volume, like TA-Lib
+        if self._obv is None:
+            self._obv = v
+        elif cl > self._prev_close:
+            self._obv += v
+        elif cl < self._prev_close:
+            self._obv -= v
+        out['obv'] = self._obv
+
+        # Z-Score
+        self._z.update(cl)
+        std = self._z.std
+        out['z_score'] = (cl - self._z.mean) / std if std != 0 else 0.0
+
+        # Session VWAP
+        if timestamp is not None:
+            day = pd.Timestamp(timestamp).normalize()
+            if day != self._vwap_day:
+                self._vwap_day = day
+                self._vwap_pv  = 0.0
+                self._vwap_vol = 0.0
+        self._vwap_pv  += (h + l + cl) / 3.0 * v
+        self._vwap_vol += v
+        out['vwap'] = self._vwap_pv / self._vwap_vol if self._vwap_vol else NAN
+
+        self._prev_close = cl
+        self.bars  += 1
+        self.values = out
+        return out
+
+    def warm_up(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Feed a history of bars; returns the per-bar outputs as a DataFrame."""
+        cols = {k: df[k].to_numpy(dtype=np.float64) for k in ('open', 'high', 'low', 'close', 'volume')}
+        rows = []
+        for i, ts in enumerate(df.index):
+            rows.append(self.update({k: col[i] for k, col in cols.items()}, ts))
+
+        logger.info(f"Streaming indicators warmed up — {len(df)} candles")
+        return pd.DataFrame(rows, index=df.index)
@@ -18,10 +18,14 @@ logger = get_logger()
 MARKET_OPEN  = 9 * 60 + 30   # 9:30 AM in minutes since midnight
 MARKET_CLOSE = 16 * 60        # 4:00 PM in minutes since midnight
 
+# Indicator columns drawn by build_chart (besides OHLCV)
+CHART_COLUMNS = ('vwap', 'ema_9', 'ema_21', 'volume_sma')
 
-def build_chart(df: pd.DataFrame, symbol: str, decision_idx: int = None) -> dict:
+
+def build_chart(df, symbol: str, decision_idx: int = None) -> dict:
     """
-    Build an Alpaca-style interactive chart with:
+    Build an Alpaca-style interactive chart from a DataFrame or
+    IndicatorFrame with:
       - Candlesticks + VWAP on main panel
       - Volume bars sharing the same x-axis below candles (secondary y-axis)
       - Grey shading for non-market hours
@@ -165,8 +169,9 @@ def build_chart(df: pd.DataFrame, symbol: str, decision_idx: int = None) -> dict
     # ------------------------------------------------------------------ #
     # 8. CURRENT PRICE LINE
     # ------------------------------------------------------------------ #
-    last_close = float(df['close'].iloc[-1])
-    first_close = float(df['close'].iloc[0])
+    close = np.asarray(df['close'])
+    last_close = float(close[-1])
+    first_close = float(close[0])
     price_change = last_close - first_close
     price_change_pct = (price_change / first_close) * 100
     price_color = '#26a69a' if price_change >= 0 else '#ef5350'
@@ -255,7 +260,7 @@ def build_chart(df: pd.DataFrame, symbol: str, decision_idx: int = None) -> dict
     )
 
     # Secondary y-axis — volume, scaled so bars sit in bottom 20% of chart
-    max_vol = df['volume'].max()
+    max_vol = np.nanmax(df['volume'])
     fig.update_yaxes(
         axis_style,
         secondary_y=True,
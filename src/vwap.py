@@ -0,0 +1,94 @@
+"""
+VWAP calculations for SYNAPSE web app.
+Anchored VWAP and standard-deviation bands in one vectorized pass: the
+running sums are global cumulative sums, and each anchor period subtracts
+the sum at its own start instead of looping over groups.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Accepted values for vwap(anchor=...)
+ANCHORS = ('session', 'week', 'index', 'rolling')
+
+
+def _period_starts(index: pd.DatetimeIndex, anchor: str) -> np.ndarray:
+    """Position of the first bar of each bar's anchor period (index must be sorted)."""
+    days = index.normalize()
+    if anchor == 'week':
+        days = days - pd.to_timedelta(index.dayofweek, unit='D')
+
+    keys   = days.asi8
+    n      = len(keys)
+    change = np.empty(n, dtype=bool)
+    change[:1] = True
+    change[1:] = keys[1:] != keys[:-1]
+    return np.maximum.accumulate(np.where(change, np.arange(n), 0))
+
+
+def vwap(df, anchor: str = 'session', start: Optional[int] = None,
+         window: Optional[int] = None, bands: Sequence[float] = ()) -> Dict[str, np.ndarray]:
+    """
+    Volume-weighted average of the typical price of `df` (a DataFrame or
+    IndicatorFrame), reset at each anchor:
+
+        session — every calendar day of the index (what the chart draws)
+        week    — every Monday
+        index   — once, at bar `start`; earlier bars are NaN
+        rolling — the last `window` bars; the first window - 1 bars are NaN
+
+    Each multiplier k in `bands` adds vwap_upper_{k} / vwap_lower_{k} at
+    k volume-weighted standard deviations. Bars with no volume so far are NaN.
+    """
+    if anchor not in ANCHORS:
+        raise ValueError(f'Unknown VWAP anchor: {anchor}')
+    if anchor == 'index' and start is None:
+        raise ValueError("anchor='index' needs start")
+    if anchor == 'rolling' and not window:
+        raise ValueError("anchor='rolling' needs window")
+
+    h = np.asarray(df['high'], dtype=np.float64)
+    l = np.asarray(df['low'], dtype=np.float64)
+    c = np.asarray(df['close'], dtype=np.float64)
+    v = np.asarray(df['volume'], dtype=np.float64)
+    n = len(c)
+    if n == 0:
+        out = {'vwap': np.empty(0)}
+        out.update({f'vwap_{side}_{k:g}': np.empty(0) for k in bands for side in ('upper', 'lower')})
+        return out
+
+    # Centred on the first price so the sum of squares stays well conditioned
+    tp   = (h + l + c) / 3.0
+    base = tp[0]
+    x    = tp - base
+
+    sums = [np.r_[0.0, np.cumsum(v)], np.r_[0.0, np.cumsum(x * v)]]
+    if bands:
+        sums.append(np.r_[0.0, np.cumsum(x * x * v)])
+
+    end = np.arange(1, n + 1)
+    if anchor in ('session', 'week'):
+        first = _period_starts(df.index, anchor)
+    elif anchor == 'index':
+        first = np.full(n, start)
+    else:
+        first = end - window
+
+    valid = (first >= 0) & (first < end)
+    first = np.clip(first, 0, n)
+    vol, pv, *rest = [s[end] - s[first] for s in sums]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid & (vol > 0), pv / vol, np.nan)
+    out = {'vwap': mean + base}
+
+    if bands:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(np.maximum(rest[0] / vol - mean * mean, 0.0))
+        for k in bands:
+            out[f'vwap_upper_{k:g}'] = out['vwap'] + k * std
+            out[f'vwap_lower_{k:g}'] = out['vwap'] - k * std
+
+    return out
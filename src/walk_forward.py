@@ -0,0 +1,119 @@
+"""
+Walk-forward analysis for SYNAPSE web app.
+Rolls train / test folds over a long bar history: each train slice picks
+the best parameters by search, the following test slice trades them out of
+sample. Indicators are computed once over the whole history and every
+fold reads a view of it, so fold edges start fully warmed up with no
+recomputation. All folds' evaluations share one process pool.
+"""
+
+import copy
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .backtest_engine import STATS
+from .config import Config
+from .indicator_frame import IndicatorFrame
+from .logger import get_logger
+from .optimizer import OPTIMIZABLE, ParameterOptimizer, rank
+
+logger = get_logger()
+
+
+def folds(n: int, train: int, test: int, start: int = 0, step: Optional[int] = None,
+          anchored: bool = False) -> List[tuple]:
+    """
+    (train_start, train_stop, test_start, test_stop) candle windows over
+    [start, n). Folds advance by `step` (default test). anchored keeps
+    every train window starting at `start` (expanding instead of rolling).
+    """
+    step, out = step or test, []
+    k = 0
+    while True:
+        train_stop = start + train + k * step
+        test_stop  = train_stop + test
+        if test_stop > n:
+            return out
+        out.append((start if anchored else train_stop - train, train_stop, train_stop, test_stop))
+        k += 1
+
+
+class WalkForward:
+
+    def __init__(self, config: Config, workers: Optional[int] = None):
+        # Fold windows begin past min_warmup_candles of the full history —
+        # inside a fold every candle is already warm
+        self.config = copy.copy(config)
+        self.config.min_warmup_candles = 0
+        self.warmup    = config.min_warmup_candles
+        self.optimizer = ParameterOptimizer(self.config, workers=workers)
+
+    def run(self, frame: IndicatorFrame, candidates: List[Dict], train: int, test: int,
+            step: Optional[int] = None, anchored: bool = False, metric: str = 'total_pnl',
+            initial_capital: float = 100_000.0) -> Dict:
+        """
+        Walk-forward over a prepared frame (optimizer.prepare_frame).
+
+        Returns:
+            folds  — DataFrame, one row per fold: windows, chosen params,
+                     in-sample metric and out-of-sample stats
+            params — DataFrame of the chosen params by test start (drift)
+            trades — out-of-sample trades of every fold, absolute indices
+            equity — out-of-sample equity, test slices chained end to end
+        """
+        if not candidates:
+            raise ValueError('Walk-forward needs at least one candidate parameter set.')
+        unknown = {field for point in candidates for field in point} - set(OPTIMIZABLE)
+        if unknown:
+            raise ValueError(f'Not an optimizable field: {", ".join(sorted(unknown))}')
+        if metric not in STATS:
+            raise ValueError(f'Unknown metric {metric!r} — use one of {", ".join(STATS)}')
+
+        windows = folds(len(frame), train, test, start=self.warmup, step=step, anchored=anchored)
+        if not windows:
+            raise ValueError(f'{len(frame)} candles is too short for one {train} + {test} fold '
+                             f'after {self.warmup} warmup candles.')
+
+        # Every fold's search in one pass over the pool
+        tasks   = [(point, w[:2]) for w in windows for point in candidates]
+        results = self.optimizer.evaluate(frame, tasks)
+        best    = [rank(results[i * len(candidates):(i + 1) * len(candidates)], metric)[0]
+                   for i in range(len(windows))]
+
+        # Then every fold's out-of-sample run, again concurrently
+        tested = self.optimizer.evaluate(frame, [(b['params'], w[2:]) for b, w in zip(best, windows)], detail=True)
+
+        rows, trades, curves, offset = [], [], [], 0.0
+        for i, ((tr0, tr1, te0, te1), b, t) in enumerate(zip(windows, best, tested)):
+            rows.append({
+                'fold':        i,
+                'train_start': frame.index[tr0],
+                'train_end':   frame.index[tr1 - 1],
+                'test_start':  frame.index[te0],
+                'test_end':    frame.index[te1 - 1],
+                **b['params'],
+                f'train_{metric}': b['stats'][metric],
+                **{f'test_{k}': v for k, v in t['stats'].items()},
+            })
+
+            fold_trades = t['trades'].copy()
+            for col in ('entry_idx', 'exit_idx', 'partial_1_idx', 'partial_2_idx'):
+                fold_trades[col] = np.where(fold_trades[col] >= 0, fold_trades[col] + te0, -1)
+            fold_trades.insert(0, 'fold', i)
+            trades.append(fold_trades)
+
+            # Each test run starts from its own capital — chain their PnL
+            curves.append(t['equity'] - t['equity'].iloc[0] + initial_capital + offset)
+            offset = curves[-1].iloc[-1] - initial_capital
+
+        table = pd.DataFrame(rows)
+        logger.info(f"Walk-forward — {len(windows)} folds, {len(candidates)} candidates each, "
+                    f"out-of-sample PnL {offset:.2f}")
+        return {
+            'folds':  table,
+            'params': table.set_index('test_start')[sorted({k for c in candidates for k in c})],
+            'trades': pd.concat(trades, ignore_index=True),
+            'equity': pd.concat(curves).rename('equity'),
+        }